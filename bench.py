@@ -0,0 +1,225 @@
+import asyncio
+import json
+import argparse
+import multiprocessing
+import platform
+import time
+from typing import Dict, List
+from utils.bench_server import serve_process
+from utils.prebuilt_body import compile_body
+from utils.replace_placeholders import compile_template, replace_placeholders
+from utils.transport import RawResponse
+from main import make_request, run_load_test
+from rich_argparse import ArgumentDefaultsRichHelpFormatter
+from datetime import datetime
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+# name -> run_load_test arguments; payloads are file names, loaded at run time.
+SCENARIOS = {
+    "get-http1": {"method": "GET", "http": "1.1"},
+    "get-http2": {"method": "GET", "http": "2"},
+    "get-raw": {"method": "GET", "transport": "raw"},
+    "post-json": {"method": "POST", "payload": "payload.json", "http": "1.1"},
+    "post-form": {
+        "method": "POST",
+        "payload": "payload.json",
+        "post_type": "form",
+        "http": "1.1",
+    },
+    "post-large": {"method": "POST", "payload": "payload_example.json", "http": "1.1"},
+}
+TEMPLATES = ("payload.json", "payload_example.json")
+
+
+class NullTransport:
+    """Answers instantly, so make_request's own overhead is all that is left."""
+
+    name = "null"
+    errors = ()
+    response = RawResponse(200, "OK", {}, b"")
+
+    async def request(self, method, url, **_):
+        return self.response, time.perf_counter(), 0, "reused", {}
+
+
+def load_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def cpu_per_call(function, calls: int) -> float:
+    """Microseconds of CPU per call of ``function``."""
+    start = time.process_time()
+    for _ in range(calls):
+        function()
+    return (time.process_time() - start) / calls * 1e6
+
+
+async def async_cpu_per_call(function, calls: int) -> float:
+    start = time.process_time()
+    for _ in range(calls):
+        await function()
+    return (time.process_time() - start) / calls * 1e6
+
+
+async def run_scenarios(
+    url: str, names: List[str], requests: int, concurrency: int
+) -> Dict[str, Dict]:
+    results = {}
+    for name in names:
+        options = dict(SCENARIOS[name])
+        if "payload" in options:
+            options["payload"] = load_json(options["payload"])
+        console.rule(f"[bold cyan] {name} [/bold cyan]")
+        stats, total_time = await run_load_test(
+            url,
+            num_requests=requests,
+            concurrency=concurrency,
+            simple=True,
+            report=False,
+            **options,
+        )
+        latency = stats["latency"]
+        results[name] = {
+            "requests": stats["completed"],
+            "failed": stats["failure_count"],
+            "duration_s": total_time,
+            "rps": stats["completed"] / total_time,
+            "cpu_s": stats["cpu_time"],
+            "rps_per_core": (
+                stats["completed"] / stats["cpu_time"] if stats["cpu_time"] else 0
+            ),
+            "cpu_us_per_request": stats["cpu_time"] / stats["completed"] * 1e6,
+            "p50_ms": latency.percentile(50) * 1000,
+            "p99_ms": latency.percentile(99) * 1000,
+        }
+    return results
+
+
+async def run_micro(calls: int) -> Dict[str, float]:
+    results = {}
+    for file in TEMPLATES:
+        payload = load_json(file)
+        template = compile_template(payload)
+        results[f"replace_placeholders ({file})"] = cpu_per_call(
+            lambda: replace_placeholders(payload), calls
+        )
+        results[f"compiled_template ({file})"] = cpu_per_call(template, calls)
+        results[f"prebuilt_body ({file})"] = cpu_per_call(
+            compile_body(payload, "json"), calls
+        )
+
+    client = NullTransport()
+    url = "http://127.0.0.1/"
+    body = compile_body(load_json("payload.json"), "json")()
+    results["make_request (GET)"] = await async_cpu_per_call(
+        lambda: make_request(client, url, "GET", {}, {}), calls
+    )
+    results["make_request (POST, prebuilt body)"] = await async_cpu_per_call(
+        lambda: make_request(client, url, "POST", body, {}), calls
+    )
+    return results
+
+
+def print_results(results: Dict) -> None:
+    table = Table(
+        "Scenario",
+        "Requests",
+        "Failed",
+        "RPS",
+        "RPS per core",
+        "CPU per request",
+        "p50",
+        "p99",
+        title="Throughput",
+    )
+    for name, result in results["scenarios"].items():
+        table.add_row(
+            name,
+            str(result["requests"]),
+            str(result["failed"]),
+            f"{result['rps']:.2f}",
+            f"{result['rps_per_core']:.2f}",
+            f"{result['cpu_us_per_request']:.1f}µs",
+            f"{result['p50_ms']:.2f}ms",
+            f"{result['p99_ms']:.2f}ms",
+        )
+    console.print(table)
+
+    table = Table("Benchmark", "CPU per call", title="Microbenchmarks")
+    for name, cpu_us in results["micro"].items():
+        table.add_row(name, f"{cpu_us:.1f}µs")
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="bench.py",
+        description="⚡ Blaze Hammer's own throughput, measured against a local stand-in server.",
+        formatter_class=ArgumentDefaultsRichHelpFormatter,
+    )
+    parser.add_argument(
+        "-n", "--requests", type=int, default=2000, help="Requests per scenario"
+    )
+    parser.add_argument(
+        "-c", "--concurrency", type=int, default=50, help="Concurrency level"
+    )
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=list(SCENARIOS),
+        default=list(SCENARIOS),
+        help="Scenarios to run",
+    )
+    parser.add_argument(
+        "--micro-calls",
+        type=int,
+        default=2000,
+        help="Calls per microbenchmark (0 skips them)",
+    )
+    parser.add_argument(
+        "--out",
+        "-o",
+        metavar="FILE",
+        default="bench_results.json",
+        help="Where to write the results as JSON",
+    )
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    ready = context.Queue()
+    server = context.Process(target=serve_process, args=(ready,), daemon=True)
+    server.start()
+    try:
+        url = f"http://127.0.0.1:{ready.get(timeout=10)}/"
+        console.print(f"[dim]Stand-in server on {url}[/]")
+        results = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": multiprocessing.cpu_count(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "scenarios": asyncio.run(
+                run_scenarios(url, args.scenarios, args.requests, args.concurrency)
+            ),
+            "micro": (
+                asyncio.run(run_micro(args.micro_calls)) if args.micro_calls else {}
+            ),
+        }
+    finally:
+        server.terminate()
+        server.join()
+
+    console.rule("[bold green] Benchmark [/bold green]")
+    print_results(results)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    console.print(f"\n[dim]Results saved to {args.out}[/]")
+
+
+if __name__ == "__main__":
+    main()
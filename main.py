@@ -1,81 +1,161 @@
 import asyncio
-import httpx
 import json
 import argparse
+import contextlib
+import multiprocessing
+import os
+import secrets
 import time
-from typing import Dict, Optional
-from utils.custom_parsers import (
-    custom_response_parsers,
-    custom_payload_parsers,
-    custom_headers_parsers,
-)
+import traceback
+from typing import Dict, List, Optional, Tuple, Union
 from utils.compare_json import compare_json
-from utils.replace_placeholders import replace_placeholders
+from utils.run_summary import (
+    SUMMARY_OPTIONS,
+    build_summary,
+    compare_summaries,
+    default_summary_path,
+    load_summary,
+    save_summary,
+)
+from utils.histogram import PERCENTILES, LatencyHistogram
+from utils.stats import (
+    PHASES,
+    count_phases,
+    count_result,
+    merge_snapshots,
+    new_stats,
+    snapshot_stats,
+)
+from utils.replace_placeholders import faker_cache_stats, replace_placeholders
+from utils.payload_pool import InlinePayloads, PayloadPool
+from utils.prebuilt_body import CONTENT_TYPES, POST_TYPES, measure_body_encoding
+from utils.multipart import MultipartBody
+from utils.print_sink import QUEUE_SIZE, PrintSink
+from utils.transport import (
+    HTTP_VERSIONS,
+    TRANSPORTS,
+    Transport,
+    all_tls,
+    create_transport,
+)
+from utils.multiprocess import PROGRESS_INTERVAL, run_processes
+from utils.dashboard import DEFAULT_REFRESH, Dashboard
+from utils.result_writer import OUTPUT_FORMATS, ResultWriter, shard_path
+from utils.metrics import MetricsServer
+from utils.scenario import endpoint, load_scenario
+from utils.replay import ReplayJobs
+from utils.random_engine import seed_all
+from utils.line_file import set_line_shard
+from utils.capacity import (
+    CAPACITY_KINDS,
+    MIN_TARGET,
+    CapacityJobs,
+    CapacitySearch,
+    describe_slo,
+    parse_slo,
+)
+from utils.scheduler import (
+    CountedJobs,
+    ProfileJobs,
+    RateJobs,
+    load_profile,
+    parse_duration,
+)
 from utils.custom_file_payload import attachments
 from rich_argparse import ArgumentDefaultsRichHelpFormatter
 from datetime import datetime
 from rich.console import Console
-from rich.live import Live
 from rich.table import Table
-from rich.panel import Panel
-from rich.progress import (
-    Progress,
-    MofNCompleteColumn,
-    TimeElapsedColumn,
-    TimeRemainingColumn,
-)
 
 console = Console()
 
 
 async def make_request(
-    client: httpx.AsyncClient,
+    client: Transport,
     url: str,
     method: str,
-    payload: Optional[Dict] = None,
-    headers: Optional[Dict] = None,
-    post_type: str = "json",
+    final_payload: Optional[Dict] = None,
+    final_headers: Optional[Dict] = None,
+    post_type: Optional[str] = "json",
     file_payload: bool = False,
+    scheduled: Optional[float] = None,
+    keep_body: bool = False,
 ) -> Dict:
-    start = time.perf_counter()
-    final_payload = {}
-    final_headers = {}
+    sent_at = time.perf_counter()
+    # In rate mode latency is measured from the intended send time, so
+    # time spent waiting for a free worker is not hidden.
+    start = scheduled if scheduled is not None else sent_at
 
     try:
-        if method == "POST":
-            final_payload = replace_placeholders(payload) if payload else {}
-            final_headers = replace_placeholders(headers) if headers else {}
-
+        if method != "GET" and final_payload is not None:
             request_args = {
-                "headers": headers,
+                "headers": final_headers,
                 "timeout": 30,
+                "keep_body": keep_body,
                 **({"files": attachments} if file_payload else {}),
             }
 
-            if post_type == "json":
+            if isinstance(final_payload, MultipartBody):
+                # Streamed from its buffers; the boundary is per request.
+                request_args["content"] = final_payload
+                request_args["headers"] = {**final_headers, **final_payload.headers}
+            elif isinstance(final_payload, bytes):
+                request_args["content"] = final_payload
+                # Replayed bodies (no post_type) keep their recorded headers.
+                if post_type and not any(
+                    k.lower() == "content-type" for k in final_headers
+                ):
+                    request_args["headers"] = {
+                        "content-type": CONTENT_TYPES[post_type],
+                        **final_headers,
+                    }
+            elif post_type == "json":
                 request_args["json"] = final_payload
             else:
                 request_args["data"] = final_payload
 
-            response = await client.post(url, **request_args)
+            response, first_byte_at, num_bytes, connection, phases = (
+                await client.request(method, url, **request_args)
+            )
         else:
-            response = await client.get(url, headers=headers, timeout=30.0)
+            response, first_byte_at, num_bytes, connection, phases = (
+                await client.request(
+                    method,
+                    url,
+                    headers=final_headers,
+                    timeout=30.0,
+                    keep_body=keep_body,
+                )
+            )
 
         return {
             "success": True,
             "status_code": response.status_code,
             "response_time": time.perf_counter() - start,
+            "ttfb": first_byte_at - start,
+            "bytes": num_bytes,
+            "connection": connection,
+            "phases": phases,
+            "sent_at": sent_at,
             "error": None,
-            "response": response,
+            "error_type": None,
+            # Only kept when something is going to read the body.
+            "response": response if keep_body else None,
             "final_payload": final_payload,
             "final_headers": final_headers,
         }
-    except (httpx.RequestError, asyncio.TimeoutError) as e:
+    except client.errors as e:
         return {
             "success": False,
             "status_code": None,
             "response_time": time.perf_counter() - start,
+            "ttfb": None,
+            "bytes": 0,
+            "connection": None,
+            "phases": {},
+            "sent_at": sent_at,
             "error": str(e),
+            "error_type": type(e).__name__,
             "response": None,
             "final_payload": final_payload,
             "final_headers": final_headers,
@@ -83,89 +163,67 @@ async def make_request(
 
 
 async def worker(
-    client: httpx.AsyncClient,
-    url: str,
-    method: str,
-    semaphore: asyncio.Semaphore,
+    worker_id: int,
+    client: Transport,
+    endpoints: List[Dict],
+    jobs: Union[CountedJobs, RateJobs, ProfileJobs, ReplayJobs, CapacityJobs],
     delay: float,
-    payload: Optional[Dict],
-    headers: Optional[Dict],
+    payloads: Union[InlinePayloads, PayloadPool, None],
     file_payload: Optional[bool],
-    post_type: str,
-    print_payload: bool,
-    print_headers: bool,
-    print_response: bool,
+    sink: Optional[PrintSink],
     stats: Dict,
-    progress: Progress,
-    task_id: int,
+    output: Optional[ResultWriter] = None,
 ) -> None:
     if delay > 0:
         await asyncio.sleep(delay)
 
-    async with semaphore:
+    while (job := await jobs.next(worker_id)) is not None:
+        if job.request is not None:
+            index, post_type = 0, None
+            method, url, final_payload, final_headers = job.request
+            generate_time = 0.0
+        else:
+            # Inline this is the rendering itself; with a pool, the queue wait.
+            generate_start = time.perf_counter()
+            index, url, final_payload, final_headers = await payloads.get()
+            generate_time = time.perf_counter() - generate_start
+            method, post_type = (
+                endpoints[index]["method"],
+                endpoints[index]["post_type"],
+            )
+        stats["in_flight"] += 1
         result = await make_request(
-            client, url, method, payload, headers, post_type, file_payload
+            client,
+            url,
+            method,
+            final_payload,
+            final_headers,
+            post_type,
+            file_payload,
+            job.scheduled,
+            sink is not None and sink.response,
         )
+        stats["in_flight"] -= 1
+        result["phases"]["generate"] = generate_time
+        result["stage"] = job.stage
+        result["endpoint"] = index
+        if job.scheduled is not None:
+            result["schedule_lag"] = result["sent_at"] - job.scheduled
+
+        record_result(result, stats, sink)
+        if output:
+            await output.write(worker_id, result)
 
-        stats["completed"] += 1
-        if result["success"]:
-            stats["success_count"] += 1
-            stats["response_times"].append(result["response_time"])
-            code = result["status_code"]
-            stats["status_codes"][code] = stats["status_codes"].get(code, 0) + 1
-
-            if any([print_response, print_payload, print_headers]):
-                timestamp = datetime.now().strftime("%H:%M:%S")
-                status_code = result["status_code"]
-
-                if print_headers:
-                    parser = custom_headers_parsers.get(
-                        status_code, custom_headers_parsers.get("all")
-                    )
-                    output = (
-                        parser(result["final_headers"])
-                        if parser
-                        else "- Not found in `custom_headers_parsers`"
-                    )
-                    console.print(
-                        f"[[bold cyan]{timestamp}[/bold cyan] • [bold magenta]Headers[/bold magenta] • [bold green]{status_code}[/bold green]]\n{output}",
-                        justify="left",
-                    )
-
-                if print_payload:
-                    parser = custom_payload_parsers.get(
-                        status_code, custom_payload_parsers.get("all")
-                    )
-                    output = (
-                        parser(result["final_payload"])
-                        if parser
-                        else "- Not Found in 'custom_payload_parsers'"
-                    )
-                    console.print(
-                        f"[{timestamp} • [yellow]Payload[/yellow] • {status_code}]\n{output}",
-                        justify="left",
-                    )
-
-                if print_response:
-                    parser = custom_response_parsers.get(
-                        status_code, custom_response_parsers.get("all")
-                    )
-                    output = (
-                        parser(result["response"])
-                        if parser
-                        else "- Not found in `custom_response_parsers`"
-                    )
-                    console.print(
-                        f"[{timestamp} • [yellow]Response[/yellow] • {status_code}]\n{output}",
-                        justify="left",
-                    )
-
-                console.print("\n")
-        else:
-            stats["failure_count"] += 1
-            stats["errors"].add(result["error"])
-        if progress:
-            progress.advance(task_id)
+
+def record_result(result: Dict, stats: Dict, sink: Optional[PrintSink]) -> None:
+    count_result(stats, result)
+    count_phases(stats, result["phases"])
+    if result.get("stage") is not None:
+        count_result(stats["stages"][result["stage"]], result)
+    if "endpoints" in stats:
+        count_result(stats["endpoints"][result["endpoint"]], result)
+    if sink:
+        sink.offer(result)
 
 
 async def run_load_test(
@@ -181,89 +239,459 @@ async def run_load_test(
     print_payload: bool = False,
     print_headers: bool = False,
     print_response: bool = False,
+    print_every: Optional[int] = None,
+    print_first: Optional[int] = None,
+    print_errors: bool = False,
+    print_queue: int = QUEUE_SIZE,
     simple: bool = False,
-) -> None:
-    stats = {
-        "success_count": 0,
-        "failure_count": 0,
-        "status_codes": {},
-        "response_times": [],
-        "errors": set(),
-        "completed": 0,
-    }
+    refresh: float = DEFAULT_REFRESH,
+    generator: str = "inline",
+    generator_workers: int = 1,
+    buffer_size: int = 1024,
+    pregenerate: int = 0,
+    rate: Optional[float] = None,
+    arrival: str = "constant",
+    profile: Optional[List[Dict]] = None,
+    capacity: Optional[Dict] = None,
+    scenario: Optional[List[Dict]] = None,
+    replay: Optional[str] = None,
+    replay_speed: float = 1.0,
+    replay_shard: Tuple[int, int] = (0, 1),
+    line_shard: Tuple[int, int] = (0, 1),
+    line_seed: Optional[str] = None,
+    histogram_out: Optional[str] = None,
+    output: Optional[str] = None,
+    output_format: Optional[str] = None,
+    metrics_port: Optional[int] = None,
+    processes: int = 1,
+    transport: str = "httpx",
+    pipeline: int = 1,
+    http: str = "auto",
+    max_connections: Optional[int] = None,
+    keepalive: bool = True,
+    h2_streams: Optional[int] = None,
+    prebuilt_body: bool = True,
+    seed: Optional[int] = None,
+    report: bool = True,
+    process_index: int = 0,
+    status_queue: Optional[multiprocessing.Queue] = None,
+) -> Tuple[Dict, float]:
+    if line_seed is None:
+        # Every process shuffles pick_line's unique mode the same way.
+        line_seed = str(seed) if seed is not None else secrets.token_hex(8)
+    if processes > 1:
+        # Every engine argument is forwarded, sharded, to the worker processes;
+        # the report, metrics and process plumbing stay in the parent.
+        options = dict(
+            url=url,
+            num_requests=num_requests,
+            concurrency=concurrency,
+            delay=delay,
+            method=method,
+            payload=payload,
+            headers=headers,
+            file_payload=file_payload,
+            post_type=post_type,
+            print_payload=print_payload,
+            print_headers=print_headers,
+            print_response=print_response,
+            print_every=print_every,
+            print_first=print_first,
+            print_errors=print_errors,
+            print_queue=print_queue,
+            simple=simple,
+            refresh=refresh,
+            generator=generator,
+            generator_workers=generator_workers,
+            buffer_size=buffer_size,
+            pregenerate=pregenerate,
+            rate=rate,
+            arrival=arrival,
+            profile=profile,
+            capacity=capacity,
+            scenario=scenario,
+            replay=replay,
+            replay_speed=replay_speed,
+            replay_shard=replay_shard,
+            line_seed=line_seed,
+            output=output,
+            output_format=output_format,
+            transport=transport,
+            pipeline=pipeline,
+            http=http,
+            max_connections=max_connections,
+            keepalive=keepalive,
+            h2_streams=h2_streams,
+            prebuilt_body=prebuilt_body,
+            seed=seed,
+            report=report,
+        )
+        console.print(f"[dim]Time:[/] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        # Merged only when the dashboard or a scrape samples, not on every report.
+        latest = {}
+        run = run_processes(process_main, options, processes, latest.__setitem__)
+        async with (
+            MetricsServer(lambda: merge_snapshots(latest), metrics_port)
+            if metrics_port
+            else contextlib.nullcontext()
+        ):
+            if not simple:
+                dashboard = Dashboard(
+                    lambda: merge_snapshots(latest),
+                    None if profile or replay else num_requests,
+                    refresh,
+                )
+                stats, total_time = await dashboard.show(run, console)
+            else:
+                console.print(
+                    f"[bold green]Starting {processes} processes[/bold green]"
+                )
+                stats, total_time = await run
+                console.print("[bold green]All requests completed![/bold green]")
 
-    start_time = time.time()
-    progress = (
-        Progress(
-            MofNCompleteColumn(),
-            TimeElapsedColumn(),
-            TimeRemainingColumn(),
-            transient=True,
-            expand=True,
+        if report:
+            print_report(
+                stats,
+                total_time,
+                rate,
+                arrival,
+                profile,
+                histogram_out,
+                transport,
+                scenario,
+            )
+            if output:
+                console.print(
+                    f"[dim]Per-request results saved to {shard_path(output, '*')}[/]"
+                )
+        return stats, total_time
+
+    # Attachments turn the body into multipart, which httpx has to build.
+    prebuilt = prebuilt_body and not file_payload
+    endpoints = scenario or [endpoint(url, method, payload, headers, post_type)]
+    stats = new_stats()
+    if scenario:
+        stats["endpoints"] = [new_stats() for _ in scenario]
+    set_line_shard(*line_shard, line_seed)
+    if seed is not None:
+        seed_all(seed, process_index)
+        if generator != "inline" and generator_workers > 1:
+            # Workers would interleave their sequences in arrival order.
+            console.print("[dim]--seed: generating payloads with one worker[/]")
+            generator_workers = 1
+    search = None
+    if replay:
+        jobs = ReplayJobs(replay, replay_speed, replay_shard)
+        num_workers = concurrency
+    elif capacity:
+        stats["stages"] = []
+        jobs = CapacityJobs(capacity["by"], arrival)
+        search = CapacitySearch(
+            jobs,
+            stats,
+            capacity["slo"],
+            capacity["start"],
+            capacity["max"],
+            capacity["step"],
         )
-        if not simple
-        else None
-    )
-    task_id = progress.add_task("", total=num_requests) if progress else None
+        if capacity["by"] == "concurrency":
+            # One worker and one pooled connection per concurrency level.
+            concurrency = int(capacity["max"])
+        num_workers = concurrency
+    elif profile:
+        stats["stages"] = [new_stats() for _ in profile]
+        jobs = ProfileJobs(profile, arrival)
+        has_rate_stage = any(stage["kind"] == "rate" for stage in profile)
+        num_workers = max(jobs.workers, concurrency if has_rate_stage else 0)
+    else:
+        jobs = (
+            RateJobs(num_requests, rate, arrival) if rate else CountedJobs(num_requests)
+        )
+        num_workers = min(concurrency, num_requests)
 
-    async with httpx.AsyncClient(
-        limits=httpx.Limits(
-            max_connections=concurrency * 2, max_keepalive_connections=concurrency
-        ),
-        http2=True,
-    ) as client:
-        semaphore = asyncio.Semaphore(concurrency)
+    if replay:
+        # Replayed requests come ready-made with their jobs.
+        payloads = None
+    elif generator == "inline":
+        payloads = InlinePayloads(endpoints, prebuilt)
+    else:
+        payloads = PayloadPool(
+            endpoints,
+            prebuilt,
+            mode=generator,
+            workers=generator_workers,
+            buffer_size=buffer_size,
+            seed=(seed, process_index) if seed is not None else None,
+            line_shard=(*line_shard, line_seed),
+        )
+    if payloads:
+        await payloads.start(pregenerate)
+    writer = ResultWriter(output, output_format) if output else None
+    sink = None
+    if print_payload or print_headers or print_response:
+        sink = PrintSink(
+            console,
+            print_payload,
+            print_headers,
+            print_response,
+            print_every,
+            print_first,
+            print_errors,
+            print_queue,
+        )
+        sink.start()
 
-        console.print(f"[dim]Time:[/] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+    start_time = time.time()
+    quiet = status_queue is not None
+
+    cpu_start = time.process_time()
+    async with (
+        MetricsServer(lambda: stats, metrics_port)
+        if metrics_port
+        else contextlib.nullcontext()
+    ), create_transport(
+        transport,
+        concurrency,
+        pipeline,
+        http,
+        max_connections,
+        keepalive,
+        h2_streams,
+        all_tls(endpoint["url"] for endpoint in endpoints) and not replay,
+    ) as client:
+        if not quiet:
+            console.print(
+                f"[dim]Time:[/] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+            )
 
         tasks = [
             asyncio.create_task(
                 worker(
+                    worker_id,
                     client,
-                    url,
-                    method,
-                    semaphore,
+                    endpoints,
+                    jobs,
                     delay,
-                    payload,
-                    headers,
+                    payloads,
                     file_payload,
-                    post_type,
-                    print_payload,
-                    print_headers,
-                    print_response,
+                    sink,
                     stats,
-                    progress,
-                    task_id,
+                    writer,
                 )
             )
-            for _ in range(num_requests)
+            for worker_id in range(num_workers)
         ]
+        if search:
+            tasks.append(asyncio.create_task(search.run()))
 
-        if simple:
-            console.print(
-                f"[bold green]Starting {num_requests} requests with concurrency {concurrency}[/bold green]"
+        if quiet:
+            reporter = asyncio.create_task(
+                report_progress(stats, process_index, status_queue)
             )
             await asyncio.gather(*tasks)
+            reporter.cancel()
+        elif simple:
+            if replay:
+                console.print(
+                    f"[bold green]Replaying {replay} with concurrency {concurrency}[/bold green]"
+                )
+            elif capacity:
+                console.print(
+                    f"[bold green]Searching {capacity['by']} for {describe_slo(capacity['slo'])}[/bold green]"
+                )
+            elif profile:
+                console.print(
+                    f"[bold green]Starting {len(profile)} stage(s) over {jobs.duration:.0f}s[/bold green]"
+                )
+            else:
+                console.print(
+                    f"[bold green]Starting {num_requests} requests with concurrency {concurrency}[/bold green]"
+                )
+            await asyncio.gather(*tasks)
             console.print("[bold green]All requests completed![/bold green]")
         else:
-            with Live(
-                Panel(progress, title="⚡ Blaze Hammer", border_style="bold magenta"),
-                refresh_per_second=60,
-                console=console,
-            ):
-                await asyncio.gather(*tasks)
+            dashboard = Dashboard(
+                lambda: stats,
+                None if profile or replay or capacity else num_requests,
+                refresh,
+            )
+            await dashboard.show(asyncio.gather(*tasks), console)
 
     total_time = time.time() - start_time
+    stats["cpu_time"] = time.process_time() - cpu_start
+    if payloads:
+        await payloads.stop()
+    if writer:
+        await writer.close()
+    if sink:
+        await sink.close()
+        stats["print_sink"] = sink.counts()
+    if replay and jobs.skipped:
+        stats["replay"] = {"skipped": jobs.skipped, "first_error": jobs.first_error}
+
+    stats["faker_cache"] = payloads.faker_cache() if payloads else faker_cache_stats()
+    if quiet:
+        status_queue.put(("done", process_index, snapshot_stats(stats), total_time))
+        return stats, total_time
+
+    if report:
+        print_report(
+            stats,
+            total_time,
+            rate,
+            arrival,
+            profile,
+            histogram_out,
+            transport,
+            scenario,
+            search,
+        )
+        if output:
+            console.print(f"[dim]Per-request results saved to {output}[/]")
+    return stats, total_time
+
+
+async def report_progress(
+    stats: Dict, process_index: int, status_queue: multiprocessing.Queue
+) -> None:
+    while True:
+        status_queue.put(("progress", process_index, snapshot_stats(stats)))
+        await asyncio.sleep(PROGRESS_INTERVAL)
+
+
+def process_main(
+    options: Dict, process_index: int, status_queue: multiprocessing.Queue
+) -> None:
+    """Entry point of a --processes worker: one event loop and client per process."""
+    try:
+        asyncio.run(
+            run_load_test(
+                **options, process_index=process_index, status_queue=status_queue
+            )
+        )
+    except BaseException:
+        status_queue.put(("error", process_index, traceback.format_exc()))
+
+
+def format_duration(seconds: float) -> str:
+    if seconds < 0.001:
+        return f"{seconds * 1e6:.0f}µs"
+    return f"{seconds * 1000:.2f}ms"
+
+
+def print_report(
+    stats: Dict,
+    total_time: float,
+    rate: Optional[float],
+    arrival: str,
+    profile: Optional[List[Dict]],
+    histogram_out: Optional[str],
+    transport: str = "httpx",
+    scenario: Optional[List[Dict]] = None,
+    capacity: Optional[CapacitySearch] = None,
+) -> None:
 
     console.rule("[bold green] Final Report [/bold green]")
     console.print(f"[bold]Duration:[/] {total_time:.2f}s")
-    console.print(f"[bold]Requests per second:[/] {num_requests / total_time:.2f}")
+    console.print(
+        f"[bold]Requests per second:[/] {stats['completed'] / total_time:.2f}"
+    )
     console.print(f"[green]Successful:[/] {stats['success_count']}")
     console.print(f"[red]Failed:[/] {stats['failure_count']}")
+    if stats["cpu_time"]:
+        console.print(
+            f"[bold]Transport:[/] {transport}, {stats['cpu_time']:.2f}s CPU, "
+            f"{stats['completed'] / stats['cpu_time']:.2f} requests per CPU-second"
+        )
+    connections = stats["connections"]
+    opened = connections["new"] + connections["new_tls"]
+    if opened or connections["reused"]:
+        console.print(
+            f"[bold]Connections:[/] {opened} new "
+            f"({connections['new_tls']} TLS handshakes), {connections['reused']} reused, "
+            f"{connections['reused'] / (opened + connections['reused']):.1%} reuse"
+        )
 
-    if stats["response_times"]:
-        avg_time = sum(stats["response_times"]) / len(stats["response_times"])
-        console.print(f"[bold]Average response time:[/] {avg_time:.3f}s")
+    latency = stats["latency"]
+    if latency.count:
+        console.print(f"[bold]Average response time:[/] {latency.mean():.3f}s")
+        console.print(
+            f"[bold]Received:[/] {stats['bytes_received'] / 1048576:.2f}MiB, "
+            f"{stats['bytes_received'] / latency.count:.0f} bytes per response"
+        )
+        latency_table = Table(
+            "", *(f"p{p:g}" for p in PERCENTILES), "Max", title="Response Times"
+        )
+        for name, histogram in (("Total", latency), ("TTFB", stats["ttfb"])):
+            latency_table.add_row(
+                name,
+                *(f"{v * 1000:.2f}ms" for v in histogram.percentiles().values()),
+                f"{histogram.max * 1000:.2f}ms",
+            )
+        console.print(latency_table)
+
+    phases = stats.get("phases", {})
+    if any(histogram.count for histogram in phases.values()):
+        phase_table = Table(
+            "Phase",
+            "Mean",
+            *(f"p{p:g}" for p in PERCENTILES),
+            "Max",
+            title="Request Phases",
+        )
+        for name in PHASES:
+            histogram = phases[name]
+            if histogram.count:
+                phase_table.add_row(
+                    name,
+                    *map(
+                        format_duration,
+                        (
+                            histogram.mean(),
+                            *histogram.percentiles().values(),
+                            histogram.max,
+                        ),
+                    ),
+                )
+        console.print(phase_table)
+
+    if stats["scheduled"]:
+        if capacity:
+            target = f"capacity search ({arrival})"
+        elif profile:
+            target = f"profile ({arrival})"
+        elif rate:
+            target = f"{rate:.2f}/s ({arrival})"
+        else:
+            target = "recorded timing"
+        console.print(
+            f"[bold]Target rate:[/] {target}, "
+            f"schedule lag avg {stats['lag_total'] / stats['scheduled'] * 1000:.2f}ms, "
+            f"max {stats['lag_max'] * 1000:.2f}ms, "
+            f"{stats['late_starts']} late starts"
+        )
+
+    printed = stats.get("print_sink")
+    if printed:
+        console.print(
+            f"[bold]Printed:[/] {printed['printed']} of {printed['sampled']} sampled, "
+            f"{printed['dropped']} dropped"
+            + (" (output queue full)" if printed["dropped"] else "")
+            + (f", {printed['failed']} failed" if printed["failed"] else "")
+        )
+
+    replayed = stats.get("replay")
+    if replayed:
+        console.print(
+            f"[bold yellow]Replay:[/] {replayed['skipped']} malformed lines skipped, "
+            f"e.g. {replayed['first_error']}"
+        )
+
+    for name, info in stats.get("faker_cache", {}).items():
+        if info["hits"] or info["misses"]:
+            console.print(
+                f"[bold]Faker {name} cache:[/] {info['hits']} hits, {info['misses']} misses ({info['currsize']}/{info['maxsize']})"
+            )
 
     console.print("\n[bold cyan]Status Code Distribution:[/bold cyan]")
     sc_table = Table("Code", "Count", "Percentage")
@@ -274,11 +702,189 @@ async def run_load_test(
         sc_table.add_row(str(code), str(count), f"{percent:.1f}%")
     console.print(sc_table)
 
+    if profile:
+        console.print("\n[bold cyan]Stages:[/bold cyan]")
+        stage_table = Table(
+            "Stage", "Duration", "Target", "Requests", "RPS", "Failed", "Avg", "p99"
+        )
+        for stage, stage_stats in zip(profile, stats["stages"]):
+            times = stage_stats["latency"]
+            ramp = " (linear)" if stage["ramp"] == "linear" else ""
+            unit = "/s" if stage["kind"] == "rate" else " conc"
+            stage_table.add_row(
+                stage["name"],
+                f"{stage['duration']:.0f}s",
+                f"{stage['target']:g}{unit}{ramp}",
+                str(stage_stats["completed"]),
+                f"{stage_stats['completed'] / stage['duration']:.2f}",
+                str(stage_stats["failure_count"]),
+                f"{times.mean() * 1000:.1f}ms" if times.count else "-",
+                f"{times.percentile(99) * 1000:.1f}ms" if times.count else "-",
+            )
+        console.print(stage_table)
+
+    if capacity:
+        print_capacity(capacity)
+
+    if scenario:
+        console.print("\n[bold cyan]Endpoints:[/bold cyan]")
+        endpoint_table = Table(
+            "Endpoint", "Method", "Weight", "Requests", "Share", "Failed", "Avg", "p99"
+        )
+        total_weight = sum(e["weight"] for e in scenario)
+        for entry, endpoint_stats in zip(scenario, stats["endpoints"]):
+            times = endpoint_stats["latency"]
+            endpoint_table.add_row(
+                entry["name"],
+                entry["method"],
+                f"{entry['weight'] / total_weight * 100:.1f}%",
+                str(endpoint_stats["completed"]),
+                f"{endpoint_stats['completed'] / stats['completed'] * 100 if stats['completed'] else 0:.1f}%",
+                str(endpoint_stats["failure_count"]),
+                f"{times.mean() * 1000:.1f}ms" if times.count else "-",
+                f"{times.percentile(99) * 1000:.1f}ms" if times.count else "-",
+            )
+        console.print(endpoint_table)
+
     if stats["errors"]:
         console.print("\n[bold red]Sample Errors:[/bold red]")
         for err in list(stats["errors"])[:3]:
             console.print(f" - {err}")
 
+    if histogram_out:
+        with open(histogram_out, "w", encoding="utf-8") as f:
+            json.dump(latency.to_dict(), f)
+        console.print(f"\n[dim]Latency histogram saved to {histogram_out}[/]")
+
+
+def print_capacity(search: CapacitySearch) -> None:
+    console.print(
+        f"\n[bold cyan]Capacity Curve[/bold cyan] [dim]({describe_slo(search.slo)})[/]"
+    )
+    unit = "/s" if search.jobs.kind == "rate" else " conc"
+    table = Table(
+        "Step",
+        "Target",
+        "Requests",
+        "RPS",
+        "Errors",
+        "p50",
+        *(f"p{p:g}" for p, _ in search.slo["latency"]),
+        "SLO",
+    )
+    # Sorted by load, the rows read as the throughput-versus-latency curve.
+    for step in sorted(
+        (step for step in search.steps if "ok" in step), key=lambda s: s["target"]
+    ):
+        table.add_row(
+            step["name"],
+            f"{step['target']:g}{unit}",
+            str(step["requests"]),
+            f"{step['rps']:.2f}",
+            f"{step['error_rate']:.2%}",
+            format_duration(step["p50"]) if step["p50"] is not None else "-",
+            *(
+                format_duration(value) if value != float("inf") else "timeout"
+                for value in step["percentiles"].values()
+            ),
+            "[green]pass[/]" if step["ok"] else "[red]fail[/]",
+        )
+    console.print(table)
+    best = search.best
+    if best:
+        console.print(
+            f"[bold]Highest sustainable throughput:[/] {best['rps']:.2f} RPS "
+            f"at {best['target']:g}{unit} ({best['name']})"
+        )
+    else:
+        lowest = min(step["target"] for step in search.steps)
+        console.print(
+            f"[bold red]No sustainable {search.jobs.kind}[/]: "
+            f"no step met the SLO, down to {lowest:g}{unit}"
+        )
+
+
+async def compare_transports(options: Dict) -> None:
+    """Run the same workload through every transport and compare their cost."""
+    results = {}
+    for name in TRANSPORTS:
+        console.rule(f"[bold cyan] Transport: {name} [/bold cyan]")
+        results[name] = await run_load_test(**options, transport=name, report=False)
+
+    table = Table(
+        "Transport",
+        "Requests",
+        "Failed",
+        "Duration",
+        "RPS",
+        "CPU",
+        "RPS per core",
+        "p50",
+        "p99",
+        title="Transport Benchmark",
+    )
+    for name, (stats, total_time) in results.items():
+        latency = stats["latency"]
+        table.add_row(
+            name,
+            str(stats["completed"]),
+            str(stats["failure_count"]),
+            f"{total_time:.2f}s",
+            f"{stats['completed'] / total_time:.2f}",
+            f"{stats['cpu_time']:.2f}s",
+            (
+                f"{stats['completed'] / stats['cpu_time']:.2f}"
+                if stats["cpu_time"]
+                else "-"
+            ),
+            f"{latency.percentile(50) * 1000:.2f}ms",
+            f"{latency.percentile(99) * 1000:.2f}ms",
+        )
+    console.print(table)
+
+
+def bench_body(payload: Dict, post_type: str, requests: int) -> None:
+    results = measure_body_encoding(payload, post_type, requests)
+    table = Table(
+        "Path",
+        "CPU per request",
+        "Encoding",
+        "Peak memory per request",
+        title="Body Encoding",
+    )
+    generation = results["values"]["cpu_us"]
+    for name, result in results.items():
+        table.add_row(
+            name,
+            f"{result['cpu_us']:.1f}µs",
+            f"{result['cpu_us'] - generation:.1f}µs" if name != "values" else "-",
+            f"{result['peak_bytes'] / 1024:.1f}KiB",
+        )
+    console.print(table)
+
+
+def merge_histograms(files: List[str]) -> None:
+    merged = None
+    for file in files:
+        with open(file, "r", encoding="utf-8") as f:
+            histogram = LatencyHistogram.from_dict(json.load(f))
+        merged = histogram if merged is None else merged.merge(histogram)
+
+    table = Table(
+        "Requests",
+        "Avg",
+        *(f"p{p:g}" for p in PERCENTILES),
+        "Max",
+        title="Merged Response Times",
+    )
+    table.add_row(
+        str(merged.count),
+        f"{merged.mean() * 1000:.2f}ms",
+        *(f"{v * 1000:.2f}ms" for v in merged.percentiles().values()),
+        f"{merged.max * 1000:.2f}ms",
+    )
+    console.print(table)
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -297,6 +903,67 @@ def main():
     parser.add_argument(
         "-d", "--delay", type=float, default=0, help="Delay between requests"
     )
+    parser.add_argument(
+        "-r",
+        "--rate",
+        type=float,
+        help="Open-loop mode: start requests at this many per second regardless of how many are in flight (-c caps in-flight requests)",
+    )
+    parser.add_argument(
+        "-t",
+        "--duration",
+        help="Run for a fixed time (e.g. 90, 30s, 5m, 1h) instead of a fixed number of requests",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help="Path to a JSON stage profile (duration plus target concurrency or rate per stage)",
+    )
+    parser.add_argument(
+        "--find-capacity",
+        metavar="SLO",
+        help="Search for the highest load that meets an SLO such as 'p99<200ms,errors<0.1%%': step the load up while it holds, then binary-search the knee (-t sets each step's length)",
+    )
+    parser.add_argument(
+        "--capacity-by",
+        choices=CAPACITY_KINDS,
+        default="concurrency",
+        help="What --find-capacity steps: concurrent requests, or an open-loop rate with -c capping in-flight requests",
+    )
+    parser.add_argument(
+        "--capacity-start",
+        type=float,
+        default=10,
+        help="First concurrency or rate tried by --find-capacity",
+    )
+    parser.add_argument(
+        "--capacity-max",
+        type=float,
+        default=1000,
+        help="Highest concurrency or rate tried by --find-capacity",
+    )
+    parser.add_argument(
+        "--scenario",
+        metavar="FILE",
+        help="Path to a JSON scenario: a weighted mix of endpoints (url, method, payload, headers) sharing one scheduler and connection pool",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="FILE",
+        help="Replay recorded requests from a JSONL file (method, url, headers, body and an optional relative timestamp per line), streamed lazily",
+    )
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        default=1.0,
+        help="Speed multiplier for the recorded timing of --replay; 0 sends as fast as possible",
+    )
+    parser.add_argument(
+        "--arrival",
+        choices=["constant", "poisson"],
+        default="constant",
+        help="Arrival process used by --rate",
+    )
     parser.add_argument(
         "-m", "--method", choices=["GET", "POST"], default="GET", help="HTTP Method"
     )
@@ -321,9 +988,9 @@ def main():
     parser.add_argument(
         "--post-type",
         "-pt",
-        choices=["json", "form"],
+        choices=POST_TYPES,
         default="json",
-        help="Body type for POST requests",
+        help="Body type for POST requests; multipart sends {file(path=...)} values as file uploads",
     )
     parser.add_argument(
         "--print-payload", "-pp", action="store_true", help="Print the payload contents"
@@ -337,21 +1004,217 @@ def main():
     parser.add_argument(
         "--print-headers", "-ph", action="store_true", help="Print the headers contents"
     )
+    parser.add_argument(
+        "--print-every",
+        type=int,
+        metavar="N",
+        help="Only print every N-th request (of those --print-errors keeps)",
+    )
+    parser.add_argument(
+        "--print-first",
+        type=int,
+        metavar="K",
+        help="Only print the first K requests per status code or error type",
+    )
+    parser.add_argument(
+        "--print-errors",
+        action="store_true",
+        help="Only print failed requests and 4xx/5xx responses",
+    )
+    parser.add_argument(
+        "--print-queue",
+        type=int,
+        default=QUEUE_SIZE,
+        metavar="N",
+        help="Results waiting to be printed before further ones are dropped (and counted) instead of slowing the requests down",
+    )
     parser.add_argument(
         "--json-diff", "-jd", nargs="+", metavar="FILE", help="Compare JSON files"
     )
+    parser.add_argument(
+        "--generator",
+        "-g",
+        choices=["inline", "thread", "process"],
+        default="inline",
+        help="Where payloads and headers are generated: inline on the event loop, or ahead of time in a thread/process pool",
+    )
+    parser.add_argument(
+        "--generator-workers",
+        type=int,
+        default=1,
+        help="Number of thread/process pool workers generating payloads",
+    )
+    parser.add_argument(
+        "--buffer-size",
+        type=int,
+        default=1024,
+        help="Maximum number of pre-generated payloads waiting in the queue",
+    )
+    parser.add_argument(
+        "--pregenerate",
+        type=int,
+        default=0,
+        help="Number of payloads to generate before the clock starts",
+    )
+    parser.add_argument(
+        "--histogram-out",
+        metavar="FILE",
+        help="Save the latency histogram in a mergeable JSON form",
+    )
+    parser.add_argument(
+        "--summary-out",
+        metavar="FILE",
+        help="Where to save the run summary (config, RPS, latency percentiles, status and error counts, CPU time); defaults to runs/<timestamp>-<pid>.json and never overwrites an existing file",
+    )
+    parser.add_argument(
+        "--no-summary",
+        action="store_true",
+        help="Do not save a run summary",
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="BASELINE",
+        help="Compare this run with a saved run summary and exit with status 1 if it regressed beyond --max-rps-drop, --max-p99-increase or --max-error-rate-increase, or no request succeeded",
+    )
+    parser.add_argument(
+        "--max-rps-drop",
+        type=float,
+        default=5.0,
+        metavar="PCT",
+        help="Largest drop in successful requests per second, in percent, that --compare accepts",
+    )
+    parser.add_argument(
+        "--max-p99-increase",
+        type=float,
+        default=10.0,
+        metavar="PCT",
+        help="Largest increase in p99 latency, in percent, that --compare accepts",
+    )
+    parser.add_argument(
+        "--max-error-rate-increase",
+        type=float,
+        default=1.0,
+        metavar="PTS",
+        help="Largest increase in the error rate, in percentage points, that --compare accepts",
+    )
+    parser.add_argument(
+        "--merge-histograms",
+        nargs="+",
+        metavar="FILE",
+        help="Merge histograms saved with --histogram-out and print their percentiles",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        metavar="FILE",
+        help="Write one record per request (timestamp, worker, status, latencies, bytes, error) to this file",
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=OUTPUT_FORMATS,
+        help="Format of --output; defaults to csv for a .csv file and jsonl otherwise",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        metavar="PORT",
+        help="Serve live stats in OpenMetrics (Prometheus) format on this port while the test runs",
+    )
+    parser.add_argument(
+        "-P",
+        "--processes",
+        type=int,
+        default=1,
+        help="Number of worker processes; requests, concurrency and rate are split between them",
+    )
+    parser.add_argument(
+        "--transport",
+        choices=TRANSPORTS,
+        default="httpx",
+        help="HTTP client backend: httpx (HTTP/2, full featured) or raw (lean asyncio HTTP/1.1 keep-alive client)",
+    )
+    parser.add_argument(
+        "--pipeline",
+        type=int,
+        default=1,
+        help="Requests in flight per connection with the raw transport (HTTP/1.1 pipelining)",
+    )
+    parser.add_argument(
+        "--http",
+        choices=HTTP_VERSIONS,
+        default="auto",
+        help="HTTP version for the httpx transport: auto (HTTP/2 when TLS negotiates it), 1.1, or 2 (also over plain http:// with prior knowledge)",
+    )
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        help="Connection pool size (split between --processes); defaults to 2x concurrency for httpx and concurrency / --pipeline for raw",
+    )
+    parser.add_argument(
+        "--no-keepalive",
+        action="store_true",
+        help="Open a new connection for every request, to measure handshake cost",
+    )
+    parser.add_argument(
+        "--h2-streams",
+        type=int,
+        metavar="N",
+        help="Concurrent HTTP/2 streams per connection; opens concurrency / N connections instead of multiplexing everything onto one",
+    )
+    parser.add_argument(
+        "--compare-transports",
+        action="store_true",
+        help="Run the workload once per transport and compare requests per second per core",
+    )
+    parser.add_argument(
+        "--no-prebuilt-body",
+        action="store_true",
+        help="Render POST payloads as dicts and let httpx encode them, instead of splicing values into a pre-serialized body",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Seed every generated value for a reproducible payload stream (each process gets its own sequence); use secure=true on a placeholder to keep it cryptographic",
+    )
+    parser.add_argument(
+        "--bench-body",
+        type=int,
+        metavar="N",
+        help="Measure CPU time and allocation per request of the prebuilt body versus the dict path over N renders, then exit",
+    )
     parser.add_argument(
         "--simple",
         "-s",
         action="store_true",
         help="Run in simple mode (no progress bar, no live updates)",
     )
+    parser.add_argument(
+        "--refresh",
+        type=float,
+        default=DEFAULT_REFRESH,
+        help="Live dashboard refreshes per second",
+    )
 
     args = parser.parse_args()
 
-    if not args.json_diff and not args.url:
+    if args.merge_histograms:
+        try:
+            merge_histograms(args.merge_histograms)
+        except Exception as e:
+            console.print(f"[bold red]Failed to merge histograms:[/] {e}")
+            exit(1)
+        exit(0)
+
+    if args.bench_body:
+        if args.post_type == "multipart":
+            parser.error("--bench-body compares json/form encodings only")
+        with open(args.payload, "r", encoding="utf-8") as f:
+            bench_body(json.load(f), args.post_type, args.bench_body)
+        exit(0)
+
+    if not (args.json_diff or args.url or args.scenario or args.replay):
         parser.error(
-            "the following argument is required: url (unless --payload-diff is used)"
+            "the following argument is required: url (unless --json-diff, --scenario or --replay is used)"
         )
 
     payload = None
@@ -373,6 +1236,57 @@ def main():
             console.print(f"[bold red]Failed to load headers:[/] {e}")
             exit(1)
 
+    capacity = None
+    if args.find_capacity:
+        if args.profile or args.replay or args.rate:
+            parser.error("--find-capacity sets the load itself")
+        if args.processes > 1 or args.compare_transports:
+            parser.error("--find-capacity runs in a single process and transport")
+        if not MIN_TARGET <= args.capacity_start <= args.capacity_max:
+            parser.error(
+                f"--capacity-start must be at least {MIN_TARGET:g} "
+                "and at most --capacity-max"
+            )
+        try:
+            capacity = {
+                "slo": parse_slo(args.find_capacity),
+                "by": args.capacity_by,
+                "start": args.capacity_start,
+                "max": args.capacity_max,
+                "step": parse_duration(args.duration or "10s"),
+            }
+        except Exception as e:
+            console.print(f"[bold red]Failed to parse SLO:[/] {e}")
+            exit(1)
+
+    profile = None
+    try:
+        if args.profile:
+            with open(args.profile, "r", encoding="utf-8") as f:
+                profile = load_profile(json.load(f))
+        elif args.duration and not capacity:
+            duration = parse_duration(args.duration)
+            if args.rate:
+                profile = load_profile([{"duration": duration, "rate": args.rate}])
+            else:
+                profile = load_profile(
+                    [{"duration": duration, "concurrency": args.concurrency}]
+                )
+    except Exception as e:
+        console.print(f"[bold red]Failed to load profile:[/] {e}")
+        exit(1)
+
+    scenario = None
+    if args.scenario:
+        try:
+            with open(args.scenario, "r", encoding="utf-8") as f:
+                scenario = load_scenario(
+                    json.load(f), os.path.dirname(os.path.abspath(args.scenario))
+                )
+        except Exception as e:
+            console.print(f"[bold red]Failed to load scenario:[/] {e}")
+            exit(1)
+
     if args.json_diff:
         for file in args.json_diff:
             try:
@@ -384,23 +1298,128 @@ def main():
                 console.print(f"[bold red]Failed to load json:[/] {e}")
         exit(1)
 
-    asyncio.run(
-        run_load_test(
-            url=args.url,
-            num_requests=args.requests,
-            concurrency=args.concurrency,
-            delay=args.delay,
-            method=args.method.upper(),
-            payload=payload,
-            file_payload=args.file_payload,
-            headers=headers,
-            post_type=args.post_type,
-            print_payload=args.print_payload,
-            print_headers=args.print_headers,
-            print_response=args.print_response,
-            simple=args.simple,
-        )
+    if args.file_payload and (args.transport == "raw" or args.compare_transports):
+        parser.error("--file-payload needs the httpx transport")
+    if args.transport == "raw" and (args.http == "2" or args.h2_streams):
+        parser.error("the raw transport only speaks HTTP/1.1")
+    if args.h2_streams is not None:
+        if args.h2_streams < 1:
+            parser.error("--h2-streams must be at least 1")
+        targets = [e["url"] for e in scenario] if scenario else [args.url]
+        if not (
+            args.http == "2"
+            or (args.http == "auto" and not args.replay and all_tls(targets))
+        ):
+            # Over plain HTTP/1.1 every lane would be a single connection.
+            parser.error("--h2-streams needs HTTP/2: use --http 2, or https:// targets")
+    if args.compare and args.compare_transports:
+        parser.error("--compare compares a single run")
+    if (
+        args.summary_out
+        and not args.no_summary
+        and not args.compare_transports
+        and os.path.exists(args.summary_out)
+    ):
+        parser.error(f"--summary-out {args.summary_out} already exists")
+    baseline = None
+    if args.compare:
+        try:
+            baseline = load_summary(args.compare)
+        except Exception as e:
+            console.print(f"[bold red]Failed to load baseline:[/] {e}")
+            exit(1)
+    if args.refresh <= 0:
+        parser.error("--refresh must be positive")
+    for name in ("print_every", "print_first", "print_queue"):
+        value = getattr(args, name)
+        if value is not None and value < 1:
+            parser.error(f"--{name.replace('_', '-')} must be at least 1")
+
+    options = dict(
+        url=args.url,
+        num_requests=args.requests,
+        concurrency=args.concurrency,
+        delay=args.delay,
+        method=args.method.upper(),
+        payload=payload,
+        file_payload=args.file_payload,
+        headers=headers,
+        post_type=args.post_type,
+        print_payload=args.print_payload,
+        print_headers=args.print_headers,
+        print_response=args.print_response,
+        print_every=args.print_every,
+        print_first=args.print_first,
+        print_errors=args.print_errors,
+        print_queue=args.print_queue,
+        simple=args.simple,
+        refresh=args.refresh,
+        generator=args.generator,
+        generator_workers=args.generator_workers,
+        buffer_size=args.buffer_size,
+        pregenerate=args.pregenerate,
+        rate=args.rate,
+        arrival=args.arrival,
+        profile=profile,
+        capacity=capacity,
+        scenario=scenario,
+        replay=args.replay,
+        replay_speed=args.replay_speed,
+        histogram_out=args.histogram_out,
+        output=args.output,
+        output_format=args.output_format,
+        metrics_port=args.metrics_port,
+        processes=args.processes,
+        pipeline=args.pipeline,
+        http=args.http,
+        max_connections=args.max_connections,
+        keepalive=not args.no_keepalive,
+        h2_streams=args.h2_streams,
+        prebuilt_body=not args.no_prebuilt_body,
+        seed=args.seed,
+    )
+    if args.compare_transports:
+        asyncio.run(compare_transports(options))
+        return
+
+    stats, total_time = asyncio.run(run_load_test(**options, transport=args.transport))
+    summary = build_summary(
+        stats,
+        total_time,
+        {
+            **{key: options[key] for key in SUMMARY_OPTIONS},
+            "transport": args.transport,
+            "duration": args.duration,
+            "profile": args.profile,
+            "scenario": args.scenario,
+            "payload": args.payload if options["method"] == "POST" else None,
+        },
     )
+    saved = True
+    if not args.no_summary:
+        path = args.summary_out or default_summary_path()
+        try:
+            save_summary(summary, path)
+            console.print(f"[dim]Run summary saved to {path}[/]")
+        except FileExistsError:
+            console.print(f"[bold red]Run summary not saved:[/] {path} already exists")
+            saved = False
+    if baseline:
+        regressions = compare_summaries(
+            baseline,
+            summary,
+            {
+                "rps": args.max_rps_drop,
+                "p99": args.max_p99_increase,
+                "error_rate": args.max_error_rate_increase,
+            },
+            args.compare,
+        )
+        if regressions:
+            console.print(f"[bold red]Regression:[/] {'; '.join(regressions)}")
+            exit(1)
+    if not saved:
+        exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,50 @@
+import asyncio
+import time
+from utils.capacity import MIN_TARGET, CapacityJobs, CapacitySearch, parse_slo
+from utils.stats import new_stats
+
+
+def test_search_gives_up_when_nothing_passes():
+    async def test():
+        # Nothing consumes the jobs, so every step fails.
+        jobs = CapacityJobs("rate")
+        search = CapacitySearch(
+            jobs, new_stats(), parse_slo("p99<100ms"), 10, 1000, 0.01
+        )
+        await asyncio.wait_for(search.run(), 5)
+        return search
+
+    search = asyncio.run(test())
+    assert search.best is None
+    assert [step["target"] for step in search.steps] == [10, 5, 2.5, 1.25, 1]
+    assert min(step["target"] for step in search.steps) >= MIN_TARGET
+
+
+def test_slot_wait_wakes_on_finish():
+    async def test():
+        jobs = CapacityJobs("rate")
+        jobs.set_target(0.001, 0)
+        assert await jobs.next() is not None
+        waiting = asyncio.create_task(jobs.next())
+        await asyncio.sleep(0.01)
+        started = time.perf_counter()
+        jobs.finish()
+        assert await asyncio.wait_for(waiting, 1) is None
+        return time.perf_counter() - started
+
+    assert asyncio.run(test()) < 0.5
+
+
+def test_slot_wait_takes_the_new_target():
+    async def test():
+        jobs = CapacityJobs("rate")
+        jobs.set_target(0.001, 0)
+        await jobs.next()
+        waiting = asyncio.create_task(jobs.next())
+        await asyncio.sleep(0.01)
+        jobs.set_target(1000, 1)
+        job = await asyncio.wait_for(waiting, 1)
+        jobs.finish()
+        return job
+
+    assert asyncio.run(test()).stage == 1
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import math
+import random
+import time
+from types import SimpleNamespace
+import pytest
+from main import merge_histograms, worker
+from utils.histogram import PERCENTILES, SUB_BUCKET_BITS, UNIT, LatencyHistogram
+from utils.payload_pool import InlinePayloads
+from utils.scenario import endpoint
+from utils.scheduler import RateJobs
+from utils.stats import new_stats
+
+# Widest bucket relative to its values: one half-octave sub-bucket.
+RELATIVE_ERROR = 2 ** -(SUB_BUCKET_BITS - 1)
+
+
+def latencies(count=20000, seed=1):
+    rng = random.Random(seed)
+    # Microseconds to tens of seconds, heavy-tailed like real latencies.
+    return [rng.lognormvariate(-4, 2) for _ in range(count)]
+
+
+def histogram_of(values):
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    return histogram
+
+
+@pytest.mark.parametrize("percent", [*PERCENTILES, 0.1, 25, 75, 99.99, 100])
+def test_percentile_error_is_within_one_bucket(percent):
+    values = latencies()
+    histogram = histogram_of(values)
+    exact = sorted(values)[max(math.ceil(len(values) * percent / 100), 1) - 1]
+    estimate = histogram.percentile(percent)
+    # Recorded in whole microseconds, reported as the bucket's upper bound.
+    assert exact - UNIT < estimate <= exact * (1 + RELATIVE_ERROR) + UNIT
+
+
+def test_small_values_are_exact_to_the_microsecond():
+    histogram = histogram_of([n * UNIT for n in range(1, 201)])
+    assert histogram.percentile(50) == pytest.approx(100 * UNIT)
+    assert histogram.percentile(100) == pytest.approx(200 * UNIT)
+
+
+def test_empty_histogram():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(99) == 0.0
+    assert histogram.mean() == 0.0
+
+
+def test_merge_equals_recording_everything_in_one():
+    values = latencies()
+    whole = histogram_of(values)
+    merged = LatencyHistogram()
+    for part in range(3):
+        merged.merge(histogram_of(values[part::3]))
+    assert merged.counts == whole.counts
+    assert (merged.count, merged.min, merged.max) == (whole.count, whole.min, whole.max)
+    assert merged.total == pytest.approx(whole.total)
+    assert merged.percentiles() == whole.percentiles()
+
+
+def test_merge_rejects_other_layouts():
+    with pytest.raises(ValueError):
+        LatencyHistogram().merge(LatencyHistogram(sub_bucket_bits=4))
+
+
+def test_merge_histograms_files(tmp_path, capsys):
+    values = latencies(3000)
+    files = []
+    for part in range(2):
+        path = tmp_path / f"run{part}.json"
+        path.write_text(json.dumps(histogram_of(values[part::2]).to_dict()))
+        files.append(str(path))
+    merge_histograms(files)
+    whole = histogram_of(values)
+    output = capsys.readouterr().out
+    assert "3000" in output
+    assert f"{whole.percentile(99) * 1000:.2f}ms" in output
+
+
+class StallingTransport:
+    """Answers at once, except for one request that stalls for ``stall``."""
+
+    errors = ()
+
+    def __init__(self, stall):
+        self.stall = stall
+        self.calls = 0
+
+    async def request(self, method, url, **_):
+        self.calls += 1
+        if self.calls == 1:
+            await asyncio.sleep(self.stall)
+        return SimpleNamespace(status_code=200), time.perf_counter(), 0, None, {}
+
+
+class Results:
+    def __init__(self):
+        self.results = []
+
+    async def write(self, worker_id, result):
+        self.results.append(result)
+
+
+def test_rate_mode_counts_the_queueing_behind_a_stall():
+    async def test():
+        stats = new_stats()
+        results = Results()
+        # One worker at 100/s: the 0.3s stall holds back ~30 scheduled slots.
+        await worker(
+            0,
+            StallingTransport(0.3),
+            [endpoint("http://test/")],
+            RateJobs(60, 100),
+            0,
+            InlinePayloads([endpoint("http://test/")]),
+            False,
+            None,
+            stats,
+            results,
+        )
+        return stats, results.results
+
+    stats, results = asyncio.run(test())
+    slow = 0.1
+    corrected = sum(r["response_time"] > slow for r in results)
+    uncorrected = sum(r["response_time"] - r["schedule_lag"] > slow for r in results)
+    assert uncorrected == 1
+    assert corrected >= 15
+    assert stats["latency"].count == 60
+    assert stats["latency"].max >= 0.3
+    assert stats["late_starts"] >= corrected - 1
@@ -0,0 +1,178 @@
+import asyncio
+import pytest
+from utils.transport import HTTP11Protocol, TransportError
+
+
+class FakeTransport:
+    def __init__(self):
+        self.written = bytearray()
+        self.closed = False
+
+    def write(self, data):
+        self.written += data
+
+    def close(self):
+        self.closed = True
+
+
+def connect(keep_alive=True):
+    protocol = HTTP11Protocol(keep_alive)
+    protocol.connection_made(FakeTransport())
+    return protocol
+
+
+def feed(protocol, data, step=None):
+    """Deliver ``data`` at once, or ``step`` bytes per read."""
+    step = step or len(data)
+    for start in range(0, len(data), step):
+        protocol.data_received(data[start : start + step])
+
+
+def run(test):
+    return asyncio.run(test())
+
+
+OK = b"HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\nhello"
+CHUNKED = (
+    b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+    b"5;ext=1\r\nhello\r\n6\r\n world\r\n0\r\nX-Trailer: yes\r\n\r\n"
+)
+
+
+@pytest.mark.parametrize("step", [None, 1, 7])
+def test_content_length(step):
+    async def test():
+        protocol = connect()
+        reply = protocol.send(b"GET / HTTP/1.1\r\n\r\n")
+        feed(protocol, OK, step)
+        response, _, received = await reply
+        assert (response.status_code, response.reason_phrase) == (200, "OK")
+        assert response.content == b"hello"
+        assert received == 5
+
+    run(test)
+
+
+@pytest.mark.parametrize("step", [None, 1, 4])
+def test_chunked(step):
+    async def test():
+        protocol = connect()
+        reply = protocol.send(b"GET / HTTP/1.1\r\n\r\n")
+        feed(protocol, CHUNKED, step)
+        response, _, received = await reply
+        assert response.content == b"hello world"
+        assert received == 11
+        assert not protocol.buffer
+
+    run(test)
+
+
+def test_pipelined_responses_resolve_in_order():
+    async def test():
+        protocol = connect()
+        replies = [protocol.send(b"GET / HTTP/1.1\r\n\r\n") for _ in range(3)]
+        feed(
+            protocol,
+            OK + CHUNKED + b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n",
+        )
+        responses = [(await reply)[0] for reply in replies]
+        assert [r.status_code for r in responses] == [200, 200, 404]
+        assert [r.content for r in responses] == [b"hello", b"hello world", b""]
+
+    run(test)
+
+
+def test_dropped_body_is_counted():
+    async def test():
+        protocol = connect()
+        reply = protocol.send(b"GET / HTTP/1.1\r\n\r\n", keep_body=False)
+        feed(protocol, OK, 3)
+        response, _, received = await reply
+        assert response.content == b""
+        assert received == 5
+
+    run(test)
+
+
+def test_head_response_has_no_body():
+    async def test():
+        protocol = connect()
+        head = protocol.send(b"HEAD / HTTP/1.1\r\n\r\n", bodiless=True)
+        get = protocol.send(b"GET / HTTP/1.1\r\n\r\n")
+        feed(protocol, b"HTTP/1.1 200 OK\r\nContent-Length: 1234\r\n\r\n" + OK)
+        response, _, received = await head
+        assert (response.status_code, response.content, received) == (200, b"", 0)
+        assert response.headers["content-length"] == "1234"
+        assert (await get)[0].content == b"hello"
+
+    run(test)
+
+
+@pytest.mark.parametrize("status", [b"204 No Content", b"304 Not Modified"])
+def test_bodiless_status(status):
+    async def test():
+        protocol = connect()
+        first = protocol.send(b"GET / HTTP/1.1\r\n\r\n")
+        second = protocol.send(b"GET / HTTP/1.1\r\n\r\n")
+        feed(protocol, b"HTTP/1.1 " + status + b"\r\nContent-Length: 5\r\n\r\n" + OK)
+        assert (await first)[0].content == b""
+        assert (await second)[0].content == b"hello"
+
+    run(test)
+
+
+@pytest.mark.parametrize("step", [None, 1])
+def test_interim_responses_are_skipped(step):
+    async def test():
+        protocol = connect()
+        reply = protocol.send(b"POST / HTTP/1.1\r\n\r\n")
+        feed(
+            protocol,
+            b"HTTP/1.1 100 Continue\r\n\r\n"
+            b"HTTP/1.1 103 Early Hints\r\nLink: </a.css>\r\n\r\n" + OK,
+            step,
+        )
+        response, _, _ = await reply
+        assert response.status_code == 200
+        assert response.content == b"hello"
+        assert not protocol.waiters
+
+    run(test)
+
+
+def test_connection_close_ends_the_connection():
+    async def test():
+        protocol = connect()
+        reply = protocol.send(b"GET / HTTP/1.1\r\n\r\n")
+        feed(
+            protocol,
+            b"HTTP/1.1 200 OK\r\nConnection: close\r\nContent-Length: 2\r\n\r\nok",
+        )
+        assert (await reply)[0].content == b"ok"
+        assert protocol.closed and protocol.transport.closed
+
+    run(test)
+
+
+def test_body_delimited_by_close():
+    async def test():
+        protocol = connect()
+        reply = protocol.send(b"GET / HTTP/1.1\r\n\r\n")
+        feed(protocol, b"HTTP/1.0 200 OK\r\n\r\nuntil ")
+        feed(protocol, b"the end")
+        protocol.connection_lost(None)
+        assert (await reply)[0].content == b"until the end"
+
+    run(test)
+
+
+def test_malformed_response_fails_the_waiter():
+    async def test():
+        protocol = connect()
+        reply = protocol.send(b"GET / HTTP/1.1\r\n\r\n")
+        feed(protocol, b"HTTP/1.1 abc OK\r\n\r\n")
+        with pytest.raises(TransportError):
+            await reply
+        assert protocol.closed
+
+    run(test)
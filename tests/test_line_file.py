@@ -0,0 +1,50 @@
+import threading
+import pytest
+from utils import line_file
+from utils.line_file import LineFile, set_line_shard
+
+LINES = [f"line {number}" for number in range(10)]
+
+
+@pytest.fixture
+def path(tmp_path, monkeypatch):
+    monkeypatch.setattr(line_file, "_shard", line_file._shard)
+    path = tmp_path / "lines.txt"
+    path.write_text("\n".join(LINES) + "\n")
+    return str(path)
+
+
+@pytest.mark.parametrize("mode", ["sequential", "unique"])
+def test_processes_split_the_lines(path, mode):
+    picked = []
+    for index in range(2):
+        # A fresh LineFile per simulated process, as after a spawn.
+        set_line_shard(index, 2, "seed")
+        lines = LineFile(path)
+        picked += [lines.pick(mode) for _ in range(5)]
+    assert sorted(picked) == sorted(LINES)
+
+
+def test_unique_cycles_through_every_line(path):
+    lines = LineFile(path)
+    picked = [lines.pick("unique") for _ in range(30)]
+    for cycle in range(3):
+        assert sorted(picked[cycle * 10 : cycle * 10 + 10]) == sorted(LINES)
+
+
+def test_threads_share_one_counter(tmp_path, monkeypatch):
+    monkeypatch.setattr(line_file, "_shard", line_file._shard)
+    path = tmp_path / "many.txt"
+    path.write_text("".join(f"{number}\n" for number in range(4000)))
+    lines = LineFile(str(path))
+    picked = []
+
+    def pick():
+        picked.extend(lines.pick("unique") for _ in range(500))
+
+    threads = [threading.Thread(target=pick) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(picked)) == 4000
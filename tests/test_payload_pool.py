@@ -0,0 +1,35 @@
+import asyncio
+import pytest
+from utils.payload_pool import PayloadPool, _render_batch
+from utils.scenario import endpoint
+
+PAYLOAD = {"name": "{faker.name}", "number": "{int(min=1,max=1000000)}", "id": "{uuid}"}
+
+
+def batches_per_worker(pool, rounds=20):
+    """One rendered batch from each of the pool's worker processes."""
+    batches = {}
+    for _ in range(rounds):
+        futures = [pool.executor.submit(_render_batch, 32) for _ in range(8)]
+        for future in futures:
+            pid, _, batch = future.result()
+            batches.setdefault(pid, batch)
+        if len(batches) > 1:
+            return list(batches.values())
+    pytest.fail("only one generator process rendered payloads")
+
+
+@pytest.mark.parametrize("seed", [None, (7, 0)])
+def test_generator_processes_render_different_payloads(seed):
+    pool = PayloadPool(
+        [endpoint("http://test/", "POST", PAYLOAD)],
+        mode="process",
+        workers=2,
+        seed=seed,
+    )
+    try:
+        first, second = batches_per_worker(pool)
+    finally:
+        asyncio.run(pool.stop())
+    for key in PAYLOAD:
+        assert [p[2][key] for p in first] != [p[2][key] for p in second]
@@ -0,0 +1,31 @@
+import asyncio
+import io
+from rich.console import Console
+from utils import print_sink
+from utils.print_sink import PrintSink
+
+
+def result(index):
+    return {"success": True, "status_code": 200, "response": {"index": index}}
+
+
+def test_raising_parser_does_not_stall_close(monkeypatch):
+    def parser(response):
+        return response["missing"]
+
+    monkeypatch.setattr(print_sink, "custom_response_parsers", {"all": parser})
+    output = io.StringIO()
+
+    async def test():
+        sink = PrintSink(Console(file=output), False, False, True, queue_size=2)
+        sink.start()
+        for index in range(20):
+            sink.offer(result(index))
+            await asyncio.sleep(0)
+        await asyncio.wait_for(sink.close(), 5)
+        return sink.counts()
+
+    counts = asyncio.run(test())
+    assert counts["printed"] == 0
+    assert counts["failed"] + counts["dropped"] == counts["sampled"] == 20
+    assert output.getvalue().count("Printing a result failed") == 1
@@ -0,0 +1,38 @@
+import multiprocessing
+from utils.random_engine import engine, reseed, seed_all
+from utils.replace_placeholders import faker
+
+
+def _draw(queue, index):
+    queue.put(
+        (index, (engine.chars("abcdef", 32), engine.random.random(), faker.name()))
+    )
+
+
+def forked_draws(count=2):
+    """What ``count`` children forked one after another draw first."""
+    context = multiprocessing.get_context("fork")
+    queue = context.SimpleQueue()
+    for index in range(count):
+        process = context.Process(target=_draw, args=(queue, index))
+        process.start()
+        process.join()
+    draws = dict(queue.get() for _ in range(count))
+    return [draws[index] for index in range(count)]
+
+
+def test_forked_children_draw_different_values():
+    reseed()
+    engine.chars("abcdef", 32)  # Leaves buffered bytes for the children.
+    first, second = forked_draws()
+    for a, b in zip(first, second):
+        assert a != b
+
+
+def test_seeded_forked_children_are_distinct_and_reproducible():
+    seed_all(42)
+    draws = forked_draws()
+    assert draws[0] != draws[1]
+    seed_all(42)
+    assert forked_draws() == draws
+    reseed()
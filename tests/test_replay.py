@@ -0,0 +1,35 @@
+import asyncio
+import json
+from utils.replay import ReplayJobs
+
+GOOD = json.dumps({"url": "http://test/", "timestamp": 0}) + "\n"
+
+
+def drain(jobs):
+    async def test():
+        requests = []
+        while (job := await jobs.next()) is not None:
+            requests.append(job.request)
+        return requests
+
+    return asyncio.run(test())
+
+
+def test_malformed_lines_are_skipped_and_counted(tmp_path):
+    path = tmp_path / "capture.jsonl"
+    path.write_text(
+        '{"url": "http://test/", "trunc\n' + GOOD + '{"method": "GET"}\n\n' + GOOD
+    )
+    jobs = ReplayJobs(str(path), speed=0)
+    assert jobs.first_timestamp == 0
+    assert len(drain(jobs)) == 2
+    assert jobs.skipped == 2
+    assert jobs.first_error.startswith(f"{path}:1: JSONDecodeError")
+
+
+def test_shards_skip_only_their_own_lines(tmp_path):
+    path = tmp_path / "capture.jsonl"
+    path.write_text(GOOD + "not json\n" + GOOD + GOOD)
+    shards = [ReplayJobs(str(path), speed=0, shard=(index, 2)) for index in range(2)]
+    assert [len(drain(jobs)) for jobs in shards] == [2, 1]
+    assert [jobs.skipped for jobs in shards] == [0, 1]
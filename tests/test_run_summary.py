@@ -0,0 +1,47 @@
+from utils.run_summary import build_summary, compare_summaries
+from utils.stats import count_result, new_stats
+
+THRESHOLDS = {"rps": 5.0, "p99": 10.0, "error_rate": 1.0}
+
+
+def summary(successes, failures, latency=0.01, duration=1.0):
+    stats = new_stats()
+    for _ in range(successes):
+        count_result(
+            stats,
+            {
+                "success": True,
+                "response_time": latency,
+                "ttfb": latency,
+                "bytes": 0,
+                "connection": None,
+                "status_code": 200,
+            },
+        )
+    for _ in range(failures):
+        count_result(
+            stats,
+            {"success": False, "error": "refused", "error_type": "ConnectError"},
+        )
+    return build_summary(stats, duration, {})
+
+
+def test_same_run_passes():
+    assert compare_summaries(summary(100, 0), summary(100, 0), THRESHOLDS, "x") == []
+
+
+def test_failing_fast_is_a_regression():
+    regressions = compare_summaries(
+        summary(100, 0), summary(0, 500), dict(THRESHOLDS, rps=50.0), "x"
+    )
+    assert "no request succeeded" in regressions
+    assert any(r.startswith("Successful RPS") for r in regressions)
+    assert any(r.startswith("Error rate") for r in regressions)
+    assert not any(r.startswith("p99") for r in regressions)
+
+
+def test_error_rate_is_gated_in_points():
+    base = summary(1000, 0)
+    assert compare_summaries(base, summary(995, 5), THRESHOLDS, "x") == []
+    regressions = compare_summaries(base, summary(980, 20), THRESHOLDS, "x")
+    assert [r.split(" +")[0] for r in regressions] == ["Error rate"]
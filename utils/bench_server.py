@@ -0,0 +1,117 @@
+import asyncio
+import sys
+import h2.config
+import h2.connection
+import h2.events
+import h2.exceptions
+
+BODY = b'{"ok":true}'
+H1_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+    b"Content-Length: %d\r\n\r\n%s" % (len(BODY), BODY)
+)
+H2_HEADERS = [
+    (":status", "200"),
+    ("content-type", "application/json"),
+    ("content-length", str(len(BODY))),
+]
+H2_PREFACE = b"PRI * HTTP/2.0"
+
+
+class StandInProtocol(asyncio.Protocol):
+    """
+    Answers every request with a tiny fixed JSON body as fast as it can.
+    Speaks keep-alive (and pipelined) HTTP/1.1, or HTTP/2 when the client
+    opens with the prior-knowledge preface.
+    """
+
+    def __init__(self):
+        self.transport = None
+        self.buffer = bytearray()
+        self.h2 = None
+        self.sniffed = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        if not self.sniffed:
+            self.buffer += data
+            if len(self.buffer) < len(H2_PREFACE):
+                return
+            self.sniffed = True
+            data, self.buffer = bytes(self.buffer), bytearray()
+            if data.startswith(H2_PREFACE):
+                self.h2 = h2.connection.H2Connection(
+                    h2.config.H2Configuration(client_side=False)
+                )
+                self.h2.initiate_connection()
+        if self.h2:
+            self._h2_received(data)
+        else:
+            self._h1_received(data)
+
+    def _h1_received(self, data):
+        buffer = self.buffer
+        buffer += data
+        responses = 0
+        while True:
+            end = buffer.find(b"\r\n\r\n")
+            if end < 0:
+                break
+            head = bytes(buffer[:end]).lower()
+            length = 0
+            start = head.find(b"content-length:")
+            if start >= 0:
+                line_end = head.find(b"\r\n", start)
+                length = int(head[start + 15 : line_end if line_end >= 0 else None])
+            if len(buffer) < end + 4 + length:
+                break
+            del buffer[: end + 4 + length]
+            responses += 1
+        if responses:
+            self.transport.write(H1_RESPONSE * responses)
+
+    def _h2_received(self, data):
+        connection = self.h2
+        try:
+            events = connection.receive_data(data)
+        except h2.exceptions.ProtocolError:
+            self.transport.write(connection.data_to_send())
+            self.transport.close()
+            return
+        for event in events:
+            if isinstance(event, h2.events.DataReceived):
+                connection.acknowledge_received_data(
+                    event.flow_controlled_length, event.stream_id
+                )
+            elif isinstance(event, h2.events.StreamEnded):
+                connection.send_headers(event.stream_id, H2_HEADERS)
+                connection.send_data(event.stream_id, BODY, end_stream=True)
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                self.transport.close()
+        self.transport.write(connection.data_to_send())
+
+
+async def serve(host: str = "127.0.0.1", port: int = 0, ready=None) -> None:
+    """Run the stand-in server forever; ``ready`` gets the bound port."""
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(StandInProtocol, host, port)
+    if ready is not None:
+        ready.put(server.sockets[0].getsockname()[1])
+    async with server:
+        await server.serve_forever()
+
+
+def serve_process(ready, host: str = "127.0.0.1", port: int = 0) -> None:
+    """multiprocessing target for serve()."""
+    try:
+        asyncio.run(serve(host, port, ready))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
+    print(f"Stand-in server on http://127.0.0.1:{port}/ (HTTP/1.1 and h2c)")
+    serve_process(None, port=port)
@@ -0,0 +1,246 @@
+import asyncio
+import math
+import random
+import re
+import time
+from typing import Dict, List, Optional
+from utils.scheduler import Job, parse_duration
+from utils.stats import new_stats
+
+CAPACITY_KINDS = ("concurrency", "rate")
+# Each step up multiplies the target by this much until the SLO breaks.
+GROWTH = 2.0
+# The binary search stops once the knee is known to within this fraction.
+PRECISION = 0.05
+# Lowest concurrency or rate (requests per second) a search tries, and its
+# finest resolution: when even this fails, nothing is sustainable.
+MIN_TARGET = 1.0
+MAX_STEPS = 30
+# Longest a step's stragglers are awaited after it ends.
+MAX_DRAIN = 30.0
+
+SLO_TERM = re.compile(r"^(p[\d.]+|errors)\s*<\s*([\d.]+\s*[a-z%]*)$")
+
+
+def parse_slo(text: str) -> Dict:
+    """
+    ``p99<200ms,errors<0.1%`` into ``{"latency": [(99.0, 0.2)],
+    "error_rate": 0.001}``. Latency limits take the --duration units;
+    the error rate is a fraction or a percentage.
+    """
+    slo = {"latency": [], "error_rate": None}
+    for term in filter(None, (t.strip() for t in text.lower().split(","))):
+        match = SLO_TERM.match(term)
+        if not match:
+            raise ValueError(f"cannot parse SLO term '{term}'")
+        name, value = match.group(1), match.group(2).replace(" ", "")
+        if name == "errors":
+            slo["error_rate"] = (
+                float(value[:-1]) / 100 if value.endswith("%") else float(value)
+            )
+        else:
+            percentile = float(name[1:])
+            if not 0 < percentile <= 100:
+                raise ValueError(f"percentile out of range in '{term}'")
+            slo["latency"].append((percentile, parse_duration(value)))
+    if not slo["latency"] and slo["error_rate"] is None:
+        raise ValueError("the SLO needs at least one term")
+    return slo
+
+
+def describe_slo(slo: Dict) -> str:
+    terms = [f"p{p:g} < {limit * 1000:g}ms" for p, limit in slo["latency"]]
+    if slo["error_rate"] is not None:
+        terms.append(f"errors < {slo['error_rate'] * 100:g}%")
+    return ", ".join(terms)
+
+
+class CapacityJobs:
+    """
+    Job source for --find-capacity: a single concurrency or rate target at
+    a time, moved by CapacitySearch. Jobs are tagged with the current step
+    (None while a finished step drains), so every step gets its own stats.
+    """
+
+    def __init__(self, kind: str, arrival: str = "constant"):
+        self.kind = kind
+        self.arrival = arrival
+        self.target = 0.0
+        self.stage = None
+        self.issued = 0
+        self.issued_per_stage = {}
+        self.next_at = None
+        self.generation = 0
+        self.done = False
+        self.changed = asyncio.Event()
+
+    def set_target(self, target: float, stage: Optional[int]) -> None:
+        self.target = target
+        self.stage = stage
+        self.next_at = None
+        self.generation += 1
+        self._wake()
+
+    def finish(self) -> None:
+        self.done = True
+        self._wake()
+
+    def _wake(self) -> None:
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def _issue(self, scheduled: Optional[float]) -> Job:
+        self.issued += 1
+        if self.stage is not None:
+            self.issued_per_stage[self.stage] = (
+                self.issued_per_stage.get(self.stage, 0) + 1
+            )
+        return Job(self.issued - 1, scheduled, self.stage)
+
+    async def next(self, worker_id: int = 0) -> Optional[Job]:
+        while not self.done:
+            if self.kind == "rate" and self.target > 0:
+                now = time.perf_counter()
+                generation = self.generation
+                if self.next_at is None:
+                    self.next_at = now
+                scheduled = self.next_at
+                if self.arrival == "poisson":
+                    self.next_at += random.expovariate(self.target)
+                else:
+                    self.next_at += 1 / self.target
+                if scheduled > now:
+                    # A new target or the end of the search cuts the wait short.
+                    try:
+                        await asyncio.wait_for(self.changed.wait(), scheduled - now)
+                    except asyncio.TimeoutError:
+                        pass
+                # Slots booked at a previous rate are booked again at this one.
+                if not self.done and generation == self.generation:
+                    return self._issue(scheduled)
+            elif self.kind == "concurrency" and worker_id < self.target:
+                return self._issue(None)
+            else:
+                await self.changed.wait()
+        return None
+
+
+class CapacitySearch:
+    """
+    Steps the target up by GROWTH while the SLO holds, then binary-searches
+    between the last passing and the first failing target, never below
+    MIN_TARGET. Every step runs for ``step_duration``; then its stragglers
+    get up to the SLO's longest latency limit to finish, and any still
+    missing count as too slow.
+    """
+
+    def __init__(
+        self,
+        jobs: CapacityJobs,
+        stats: Dict,
+        slo: Dict,
+        start: float,
+        maximum: float,
+        step_duration: float,
+    ):
+        self.jobs = jobs
+        self.stats = stats
+        self.slo = slo
+        self.start = start
+        self.maximum = maximum
+        self.step_duration = step_duration
+        self.steps: List[Dict] = []
+        self.best: Optional[Dict] = None
+
+    def _round(self, target: float) -> float:
+        if self.jobs.kind == "concurrency":
+            target = round(target)
+        return max(target, MIN_TARGET)
+
+    async def run(self) -> None:
+        good, bad = 0.0, None
+        target = self._round(min(self.start, self.maximum))
+        try:
+            while len(self.steps) < MAX_STEPS:
+                step = await self._step(target)
+                if step["ok"]:
+                    good = target
+                    if self.best is None or step["rps"] > self.best["rps"]:
+                        self.best = step
+                else:
+                    bad = target
+
+                if bad is None:
+                    if target >= self.maximum:
+                        break
+                    target = self._round(min(target * GROWTH, self.maximum))
+                    continue
+                # With nothing passing, this stops once MIN_TARGET itself failed.
+                if bad - good <= max(good * PRECISION, MIN_TARGET):
+                    break
+                target = self._round((good + bad) / 2)
+                if target in (good, bad):
+                    break
+        finally:
+            self.jobs.finish()
+
+    async def _step(self, target: float) -> Dict:
+        index = len(self.steps)
+        stage_stats = new_stats()
+        self.stats.setdefault("stages", []).append(stage_stats)
+        step = {
+            "name": f"Step {index + 1}",
+            "kind": self.jobs.kind,
+            "target": target,
+        }
+        self.steps.append(step)
+
+        self.jobs.set_target(target, index)
+        started = time.perf_counter()
+        await asyncio.sleep(self.step_duration)
+        # Keep the load level while the step's own requests finish.
+        self.jobs.stage = None
+        duration = time.perf_counter() - started
+        limit = max((limit for _, limit in self.slo["latency"]), default=1.0)
+        deadline = time.perf_counter() + min(limit, MAX_DRAIN)
+        while self._outstanding(index) and time.perf_counter() < deadline:
+            await asyncio.sleep(min(0.01, limit))
+
+        step.update(self._evaluate(stage_stats, self._outstanding(index), duration))
+        return step
+
+    def _outstanding(self, index: int) -> int:
+        issued = self.jobs.issued_per_stage.get(index, 0)
+        return issued - self.stats["stages"][index]["completed"]
+
+    def _evaluate(self, stats: Dict, outstanding: int, duration: float) -> Dict:
+        latency = stats["latency"]
+        total = stats["completed"] + outstanding
+        server_errors = sum(
+            count for code, count in stats["status_codes"].items() if code >= 500
+        )
+        errors = stats["failure_count"] + server_errors
+        result = {
+            "duration": duration,
+            "requests": stats["completed"],
+            "rps": stats["completed"] / duration,
+            "error_rate": errors / total if total else 0.0,
+            "p50": latency.percentile(50) if latency.count else None,
+            "percentiles": {},
+            "ok": bool(total),
+        }
+        for percentile, limit in self.slo["latency"]:
+            # Requests still in flight are slower than anything recorded.
+            adjusted = (
+                percentile * (latency.count + outstanding) / latency.count
+                if latency.count
+                else math.inf
+            )
+            value = latency.percentile(adjusted) if adjusted <= 100 else math.inf
+            result["percentiles"][percentile] = value
+            result["ok"] = result["ok"] and value < limit
+        if self.slo["error_rate"] is not None:
+            result["ok"] = (
+                result["ok"] and result["error_rate"] < self.slo["error_rate"]
+            )
+        return result
@@ -1,6 +1,9 @@
 # Create an empty dictionary to hold file attachments for the request.
 # Uncomment the line below and replace 'example.jpg' with your actual file path
 # to prepare the file for uploading. The file is opened in binary read mode ('rb').
+# An open file is read once, so later requests send it empty: to upload the
+# same file on every request, use --post-type multipart with
+# "{file(path=example.jpg)}" in the payload instead.
 # Example of adding a file:
 # attachments = {'example': open('example.jpg', 'rb')}
 
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional
+from rich.console import Console, Group
+from rich.live import Live
+from rich.panel import Panel
+from rich.table import Table
+from rich.progress import (
+    Progress,
+    MofNCompleteColumn,
+    TimeElapsedColumn,
+    TimeRemainingColumn,
+)
+
+DEFAULT_REFRESH = 4.0
+# Rolling windows, in seconds, shown side by side.
+WINDOWS = (1, 10)
+
+
+class Dashboard:
+    """
+    Live view of a run: progress plus rolling-window RPS, latency, status
+    codes and errors. It samples the stats from its own task a few times
+    per second, so the workers only ever bump counters.
+    """
+
+    def __init__(
+        self,
+        sample: Callable[[], Dict],
+        total: Optional[int] = None,
+        refresh: float = DEFAULT_REFRESH,
+    ):
+        self.sample = sample
+        self.refresh = refresh
+        self.progress = Progress(
+            MofNCompleteColumn(),
+            TimeElapsedColumn(),
+            TimeRemainingColumn(),
+            transient=True,
+            expand=True,
+        )
+        self.task_id = self.progress.add_task("", total=total)
+        # (time, completed, failures, status codes, latency counters)
+        self.history = deque()
+
+    def _record(self) -> Dict:
+        stats = self.sample()
+        now = time.perf_counter()
+        self.history.append(
+            (
+                now,
+                stats["completed"],
+                stats["failure_count"],
+                dict(stats["status_codes"]),
+                stats["latency"].counts[:],
+            )
+        )
+        while len(self.history) > 2 and self.history[1][0] <= now - WINDOWS[-1]:
+            self.history.popleft()
+        self.progress.update(self.task_id, completed=stats["completed"])
+        return stats
+
+    def _since(self, moment: float):
+        """Latest sample taken at or before ``moment``, else the oldest one."""
+        for entry in reversed(self.history):
+            if entry[0] <= moment:
+                return entry
+        return self.history[0]
+
+    def render(self) -> Panel:
+        stats = self._record()
+        now, completed, failures, codes, _ = self.history[-1]
+
+        rows = {"RPS": [], "p50": [], "p99": [], "Failed": []}
+        seen_codes = sorted(codes)
+        for code in seen_codes:
+            rows[f"HTTP {code}"] = []
+        for window in WINDOWS:
+            then, then_completed, then_failures, then_codes, then_counts = self._since(
+                now - window
+            )
+            elapsed = now - then
+            if elapsed <= 0:
+                for values in rows.values():
+                    values.append("-")
+                continue
+            done = completed - then_completed
+            failed = failures - then_failures
+            recent = stats["latency"].difference(then_counts)
+            rows["RPS"].append(f"{done / elapsed:.1f}")
+            for p in (50, 99):
+                rows[f"p{p}"].append(
+                    f"{recent.percentile(p) * 1000:.2f}ms" if recent.count else "-"
+                )
+            rows["Failed"].append(
+                f"{failed / elapsed:.1f}/s ({failed / done * 100 if done else 0:.1f}%)"
+            )
+            for code in seen_codes:
+                count = codes[code] - then_codes.get(code, 0)
+                rows[f"HTTP {code}"].append(f"{count / elapsed:.1f}/s")
+
+        table = Table("", *(f"Last {w}s" for w in WINDOWS), expand=True)
+        for name, values in rows.items():
+            table.add_row(name, *values)
+
+        return Panel(
+            Group(
+                self.progress,
+                table,
+                f"[bold]In flight:[/] {stats['in_flight']}   "
+                f"[green]Successful:[/] {stats['success_count']}   "
+                f"[red]Failed:[/] {failures}",
+            ),
+            title="⚡ Blaze Hammer",
+            border_style="bold magenta",
+        )
+
+    async def _tick(self, live: Live) -> None:
+        while True:
+            await asyncio.sleep(1 / self.refresh)
+            live.update(self.render(), refresh=True)
+
+    async def show(self, awaitable: Awaitable, console: Console):
+        """Keep the dashboard on screen until ``awaitable`` finishes."""
+        with Live(self.render(), auto_refresh=False, console=console) as live:
+            ticker = asyncio.create_task(self._tick(live))
+            try:
+                return await awaitable
+            finally:
+                ticker.cancel()
+                live.update(self.render(), refresh=True)
@@ -0,0 +1,148 @@
+import math
+import operator
+from array import array
+
+# Sub-buckets per power of two; 2**8 keeps every bucket within ~0.8% of its value.
+SUB_BUCKET_BITS = 8
+# Values are recorded in whole microseconds, up to one hour.
+UNIT = 1e-6
+HIGHEST = 3600.0
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear histogram of latencies in seconds. Memory is fixed
+    (a few thousand array-backed counters) no matter how many values are
+    recorded; percentiles are accurate to within one bucket.
+    """
+
+    def __init__(self, sub_bucket_bits=SUB_BUCKET_BITS, highest=HIGHEST):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.half_count = self.sub_bucket_count >> 1
+        self.highest_units = int(highest / UNIT)
+        self.counts = array("Q", [0]) * (self._index(self.highest_units) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _index(self, units):
+        if units < self.sub_bucket_count:
+            return units
+        shift = units.bit_length() - self.sub_bucket_bits
+        return (
+            self.sub_bucket_count
+            + (shift - 1) * self.half_count
+            + ((units >> shift) - self.half_count)
+        )
+
+    def _upper(self, index):
+        """Highest value, in seconds, that lands in bucket ``index``."""
+        if index < self.sub_bucket_count:
+            return index * UNIT
+        shift, offset = divmod(index - self.sub_bucket_count, self.half_count)
+        shift += 1
+        return (((offset + self.half_count + 1) << shift) - 1) * UNIT
+
+    def record(self, seconds):
+        units = min(max(int(seconds / UNIT), 0), self.highest_units)
+        self.counts[self._index(units)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent):
+        if not self.count:
+            return 0.0
+        rank = max(math.ceil(self.count * percent / 100), 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._upper(index), self.max)
+        return self.max
+
+    def percentiles(self, percents=PERCENTILES):
+        return {p: self.percentile(p) for p in percents}
+
+    def buckets(self):
+        """Yield ``(upper_bound_seconds, count)`` for every non-empty bucket."""
+        for index, count in enumerate(self.counts):
+            if count:
+                yield self._upper(index), count
+
+    def cumulative(self, bounds):
+        """Number of values at or below each of the sorted ``bounds`` (seconds)."""
+        result = []
+        seen = 0
+        for upper, count in self.buckets():
+            while len(result) < len(bounds) and upper > bounds[len(result)]:
+                result.append(seen)
+            seen += count
+        result.extend([seen] * (len(bounds) - len(result)))
+        return result
+
+    def copy(self):
+        clone = object.__new__(LatencyHistogram)
+        clone.__dict__.update(self.__dict__)
+        clone.counts = self.counts[:]
+        return clone
+
+    def merge(self, other):
+        if other.sub_bucket_bits != self.sub_bucket_bits or len(other.counts) != len(
+            self.counts
+        ):
+            raise ValueError("cannot merge histograms with different layouts")
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def difference(self, counts):
+        """
+        Histogram of what was recorded since ``counts`` (an earlier copy of
+        ``self.counts``) was taken. Only the counters are exact: ``min`` and
+        ``max`` are those of the whole histogram and ``total`` is unknown.
+        """
+        recent = LatencyHistogram(self.sub_bucket_bits, self.highest_units * UNIT)
+        recent.counts = array("Q", map(operator.sub, self.counts, counts))
+        recent.count = sum(recent.counts)
+        recent.min = self.min
+        recent.max = self.max
+        return recent
+
+    def to_dict(self):
+        """Compact, JSON-friendly form: only non-empty buckets are kept."""
+        return {
+            "sub_bucket_bits": self.sub_bucket_bits,
+            "highest": self.highest_units * UNIT,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min if self.count else None,
+            "max": self.max,
+            "counts": [[i, c] for i, c in enumerate(self.counts) if c],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data["sub_bucket_bits"], data["highest"])
+        for index, count in data["counts"]:
+            histogram.counts[index] = count
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.min = data["min"] if data["min"] is not None else math.inf
+        histogram.max = data["max"]
+        return histogram
@@ -0,0 +1,153 @@
+import contextlib
+import math
+import mmap
+import os
+import random
+import secrets
+import struct
+import threading
+from array import array
+from functools import lru_cache
+from itertools import count
+from rich.console import Console
+from utils.random_engine import engine
+
+PICK_MODES = ("random", "sequential", "unique")
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"BHIDX1\0\0"
+# magic, file size, file mtime (ns), number of lines
+INDEX_HEADER = struct.Struct("<8sQQQ")
+
+console = Console(stderr=True)
+
+# This process's share of the sequential and unique positions, see
+# set_line_shard.
+_shard = (0, 1, secrets.token_hex(8))
+
+
+def set_line_shard(index: int, count: int, seed: str) -> None:
+    """
+    Make this process walk positions ``index``, ``index + count``, ... of
+    every file's sequence, shuffled for ``unique`` from ``seed``. Processes
+    sharing a seed and count split the lines between them without repeats.
+    """
+    global _shard
+    _shard = (index, count, seed)
+
+
+def _build_offsets(data) -> array:
+    """Start offset of every line, plus the end of the file."""
+    offsets = array("Q", [0])
+    find = data.find
+    append = offsets.append
+    position = find(b"\n")
+    while position != -1:
+        append(position + 1)
+        position = find(b"\n", position + 1)
+    if offsets[-1] != len(data):
+        append(len(data))
+    return offsets
+
+
+class LineFile:
+    """
+    Random access to the lines of a (possibly huge) file. The file is
+    memory-mapped and only a compact array of line offsets is kept, 8 bytes
+    per line. With a sidecar index (``<file>.idx``) the offsets are mapped
+    too, so worker processes share both through the page cache.
+    """
+
+    def __init__(self, path: str, persist_index: bool = False):
+        self.path = path
+        self._file = open(path, "rb")
+        stat = os.fstat(self._file.fileno())
+        self.size = stat.st_size
+        self.data = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.size
+            else b""
+        )
+        self.offsets = self._load_index(stat.st_mtime_ns)
+        if self.offsets is None:
+            self.offsets = _build_offsets(self.data)
+            if persist_index:
+                self._save_index(stat.st_mtime_ns)
+        self.lines = len(self.offsets) - 1
+        self._counter = count()
+        self._cycle = None
+        # Generator threads share the counter.
+        self._lock = threading.Lock()
+
+    def _load_index(self, mtime_ns: int):
+        index_path = self.path + INDEX_SUFFIX
+        try:
+            with open(index_path, "rb") as f:
+                header = f.read(INDEX_HEADER.size)
+                magic, size, mtime, lines = INDEX_HEADER.unpack(header)
+                if (magic, size, mtime) != (INDEX_MAGIC, self.size, mtime_ns):
+                    return None
+                index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, struct.error, ValueError):
+            return None
+        offsets = memoryview(index)[INDEX_HEADER.size :].cast("Q")
+        return offsets if len(offsets) == lines + 1 else None
+
+    def _save_index(self, mtime_ns: int) -> None:
+        """
+        Best effort: the index is only a cache, so when it cannot be written
+        the offsets just stay in memory for this process.
+        """
+        index_path = self.path + INDEX_SUFFIX
+        temporary = f"{index_path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, "wb") as f:
+                f.write(
+                    INDEX_HEADER.pack(
+                        INDEX_MAGIC, self.size, mtime_ns, len(self.offsets) - 1
+                    )
+                )
+                self.offsets.tofile(f)
+            os.replace(temporary, index_path)
+        except OSError as e:
+            with contextlib.suppress(OSError):
+                os.remove(temporary)
+            console.print(f"[dim]pick_line: not saving {index_path}: {e}[/]")
+
+    def line(self, number: int) -> str:
+        start, end = self.offsets[number], self.offsets[number + 1]
+        return self.data[start:end].decode("utf-8", errors="replace").strip()
+
+    def pick(self, mode: str = "random") -> str:
+        if not self.lines:
+            return ""
+        if mode == "random":
+            return self.line(engine.random.randrange(self.lines))
+        index, stride, seed = _shard
+        with self._lock:
+            position = next(self._counter) * stride + index
+            if mode == "unique":
+                position = self._unique(position, seed)
+        return self.line(position % self.lines)
+
+    def _unique(self, position: int, seed: str) -> int:
+        """
+        ``position``-th line of a random permutation of all lines, without
+        storing the permutation: ``(a * i + b) % n`` with ``a`` coprime to
+        ``n`` visits every line once per cycle. Each cycle reshuffles, the
+        same way in every process with the same ``seed``.
+        """
+        cycle, position = divmod(position, self.lines)
+        if self._cycle is None or self._cycle[:2] != (seed, cycle):
+            shuffle = random.Random(f"{seed}:{cycle}")
+            multiplier = shuffle.randrange(1, self.lines + 1)
+            while math.gcd(multiplier, self.lines) != 1:
+                multiplier = shuffle.randrange(1, self.lines + 1)
+            self._cycle = (seed, cycle, multiplier, shuffle.randrange(self.lines))
+        _, _, multiplier, shift = self._cycle
+        return (multiplier * position + shift) % self.lines
+
+
+@lru_cache(maxsize=None)
+def get_line_file(path: str, persist_index: bool = False) -> LineFile:
+    """One LineFile per path (and index setting) per process."""
+    return LineFile(path, persist_index)
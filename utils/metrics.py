@@ -0,0 +1,158 @@
+import asyncio
+from typing import Callable, Dict, List
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+# Bucket bounds, in seconds, exported for the latency histograms.
+BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+COUNTERS = (
+    "completed",
+    "success_count",
+    "failure_count",
+    "in_flight",
+    "bytes_received",
+    "late_starts",
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram(lines: List[str], name: str, help: str, histogram) -> None:
+    lines.append(f"# TYPE {name} histogram")
+    lines.append(f"# UNIT {name} seconds")
+    lines.append(f"# HELP {name} {help}")
+    for bound, count in zip(BUCKETS, histogram.cumulative(BUCKETS)):
+        lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+    lines.append(f'{name}_bucket{{le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum {histogram.total}")
+    lines.append(f"{name}_count {histogram.count}")
+
+
+def render_metrics(snapshot: Dict) -> str:
+    """OpenMetrics exposition of a snapshot taken by take_snapshot."""
+    lines = [
+        "# TYPE blazehammer_requests counter",
+        "# HELP blazehammer_requests Requests completed, successful or not.",
+        f"blazehammer_requests_total {snapshot['completed']}",
+        "# TYPE blazehammer_responses counter",
+        "# HELP blazehammer_responses Responses received, by status code.",
+    ]
+    for code, count in sorted(snapshot["status_codes"].items()):
+        lines.append(f'blazehammer_responses_total{{code="{code}"}} {count}')
+    lines += [
+        "# TYPE blazehammer_failures counter",
+        "# HELP blazehammer_failures Requests that got no response, by error class.",
+    ]
+    for kind, count in sorted(snapshot["error_types"].items()):
+        lines.append(f'blazehammer_failures_total{{error="{_escape(kind)}"}} {count}')
+    lines += [
+        "# TYPE blazehammer_in_flight gauge",
+        "# HELP blazehammer_in_flight Requests currently waiting for a response.",
+        f"blazehammer_in_flight {snapshot['in_flight']}",
+        "# TYPE blazehammer_received_bytes counter",
+        "# UNIT blazehammer_received_bytes bytes",
+        "# HELP blazehammer_received_bytes Response body bytes received.",
+        f"blazehammer_received_bytes_total {snapshot['bytes_received']}",
+        "# TYPE blazehammer_late_starts counter",
+        "# HELP blazehammer_late_starts Requests sent more than 1ms after their scheduled slot.",
+        f"blazehammer_late_starts_total {snapshot['late_starts']}",
+        "# TYPE blazehammer_connections counter",
+        "# HELP blazehammer_connections Responses by connection: new, new_tls (with a TLS handshake) or reused.",
+    ]
+    for state, count in snapshot["connections"].items():
+        lines.append(f'blazehammer_connections_total{{state="{state}"}} {count}')
+    _histogram(
+        lines,
+        "blazehammer_response_seconds",
+        "Response time of successful requests.",
+        snapshot["latency"],
+    )
+    _histogram(
+        lines,
+        "blazehammer_ttfb_seconds",
+        "Time to first byte of successful requests.",
+        snapshot["ttfb"],
+    )
+    lines.append("# EOF\n")
+    return "\n".join(lines)
+
+
+def take_snapshot(stats: Dict) -> Dict:
+    """Cheap, consistent copy of what render_metrics needs."""
+    snapshot = {key: stats[key] for key in COUNTERS}
+    snapshot["status_codes"] = dict(stats["status_codes"])
+    snapshot["error_types"] = dict(stats["error_types"])
+    snapshot["connections"] = dict(stats["connections"])
+    snapshot["latency"] = stats["latency"].copy()
+    snapshot["ttfb"] = stats["ttfb"].copy()
+    return snapshot
+
+
+class MetricsServer:
+    """
+    Minimal HTTP endpoint serving live stats in OpenMetrics format. The
+    event loop only copies the counters; the text is built in a thread.
+    """
+
+    def __init__(self, sample: Callable[[], Dict], port: int, host: str = "0.0.0.0"):
+        self.sample = sample
+        self.port = port
+        self.host = host
+        self.server = None
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 10)
+            method, path, *_ = head.split(b" ", 2)
+            if path.split(b"?")[0] not in (b"/", b"/metrics"):
+                status, content_type, body = (
+                    "404 Not Found",
+                    "text/plain",
+                    b"not found\n",
+                )
+            else:
+                snapshot = take_snapshot(self.sample())
+                text = await asyncio.to_thread(render_metrics, snapshot)
+                status, content_type, body = "200 OK", CONTENT_TYPE, text.encode()
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                + (body if method != b"HEAD" else b"")
+            )
+            await writer.drain()
+        except (
+            asyncio.IncompleteReadError,
+            asyncio.LimitOverrunError,
+            asyncio.TimeoutError,
+            ConnectionError,
+            ValueError,
+        ):
+            pass
+        finally:
+            writer.close()
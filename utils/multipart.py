@@ -0,0 +1,152 @@
+import mimetypes
+import mmap
+import os
+import re
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Tuple, Union
+from utils.prebuilt_body import _form_value
+from utils.random_engine import engine
+from utils.replace_placeholders import _compile, parse_args
+
+FILE_PATTERN = re.compile(r"^\{file\((.*)\)\}$")
+# Largest slice of a file handed to the transport at a time.
+STREAM_CHUNK = 1 << 18
+
+
+class MappedFile:
+    """A file mapped read-only once per process and shared by every request."""
+
+    __slots__ = ("path", "view")
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self.view = memoryview(
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+            )
+
+    def __len__(self) -> int:
+        return len(self.view)
+
+    def __reduce__(self):
+        # Rendered in a --generator process: the parent maps its own copy.
+        return mapped_file, (self.path,)
+
+
+@lru_cache(maxsize=None)
+def mapped_file(path: str) -> MappedFile:
+    return MappedFile(path)
+
+
+def _quote(name: str) -> str:
+    # Same escaping as httpx (the HTML5 form-data rules).
+    return name.replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+
+
+class MultipartBody:
+    """
+    One rendered multipart/form-data body. Fields are kept as separate
+    buffers, files as views of their mapping, and are never joined: the
+    transports stream them as they are.
+    """
+
+    __slots__ = ("boundary", "fields", "headers")
+
+    def __init__(self, boundary: bytes, fields: List[Tuple[str, bytes, object]]):
+        self.boundary = boundary
+        self.fields = fields
+        length = sum(len(header) + len(data) for _, header, data in fields)
+        length += (len(boundary) + 4) * (len(fields) + 1) + 2
+        self.headers = {
+            "content-type": f"multipart/form-data; boundary={boundary.decode()}",
+            "content-length": str(length),
+        }
+
+    def __len__(self) -> int:
+        return int(self.headers["content-length"])
+
+    def buffers(self) -> Iterator[Union[bytes, memoryview]]:
+        """The body in order; framing and small fields are coalesced."""
+        delimiter = b"--" + self.boundary
+        pending = b""
+        for _, header, data in self.fields:
+            pending += delimiter + header
+            if isinstance(data, MappedFile):
+                yield pending
+                if data.view:
+                    yield data.view
+                pending = b"\r\n"
+            else:
+                pending += data + b"\r\n"
+        yield pending + delimiter + b"--\r\n"
+
+    async def __aiter__(self):
+        for buffer in self.buffers():
+            if len(buffer) <= STREAM_CHUNK:
+                yield buffer
+                continue
+            for start in range(0, len(buffer), STREAM_CHUNK):
+                yield buffer[start : start + STREAM_CHUNK]
+
+    def describe(self) -> Dict[str, str]:
+        """Field values, with files summarized, for printing and parsers."""
+        return {
+            name: (
+                f"<file {data.path}, {len(data)} bytes>"
+                if isinstance(data, MappedFile)
+                else data.decode("utf-8", errors="replace")
+            )
+            for name, _, data in self.fields
+        }
+
+
+def _file_field(name: str, arguments: str) -> Tuple[str, bytes, MappedFile]:
+    args = parse_args(arguments)
+    if "path" not in args:
+        raise ValueError(f"file field '{name}' needs a path")
+    path = args["path"].strip()
+    filename = args.get("filename", os.path.basename(path)).strip()
+    content_type = (
+        args.get("content_type")
+        or mimetypes.guess_type(filename)[0]
+        or "application/octet-stream"
+    ).strip()
+    header = (
+        f'\r\nContent-Disposition: form-data; name="{_quote(name)}"; '
+        f'filename="{_quote(filename)}"\r\nContent-Type: {content_type}\r\n\r\n'
+    )
+    return name, header.encode(), mapped_file(path)
+
+
+def compile_multipart(payload: Dict) -> Callable[[], MultipartBody]:
+    """
+    Pre-frame a multipart template once. ``{file(path=..., filename=...,
+    content_type=...)}`` values become file parts, mapped from disk; every
+    other value is a form field. Per request only the boundary and the
+    dynamic fields are generated.
+    """
+    static = []
+    dynamic = []
+    for key, value in payload.items():
+        match = FILE_PATTERN.match(value) if isinstance(value, str) else None
+        if match:
+            static.append(_file_field(str(key), match.group(1)))
+            continue
+        name = str(key)
+        header = f'\r\nContent-Disposition: form-data; name="{_quote(name)}"\r\n\r\n'
+        value, is_static = _compile(value, 1)
+        if is_static:
+            static.append((name, header.encode(), _form_value(value).encode()))
+        else:
+            dynamic.append(len(static))
+            static.append((name, header.encode(), value))
+
+    def render():
+        fields = static.copy()
+        for index in dynamic:
+            name, header, generator = fields[index]
+            fields[index] = (name, header, _form_value(generator()).encode())
+        return MultipartBody(engine.bytes(16).hex().encode(), fields)
+
+    return render
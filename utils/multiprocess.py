@@ -0,0 +1,113 @@
+import asyncio
+import multiprocessing
+import queue
+from typing import Callable, Dict, Optional, Tuple
+from utils.result_writer import shard_path
+from utils.stats import merge_snapshots
+
+# How often worker processes report their progress to the parent.
+PROGRESS_INTERVAL = 0.25
+
+
+def _split(total: int, index: int, parts: int) -> int:
+    return total // parts + (1 if index < total % parts else 0)
+
+
+def shard_options(options: Dict, index: int, processes: int) -> Dict:
+    """The slice of a run (requests, concurrency, rate, stages) one process handles."""
+    shard = dict(options)
+    shard["num_requests"] = _split(options["num_requests"], index, processes)
+    shard["concurrency"] = max(_split(options["concurrency"], index, processes), 1)
+    shard["pregenerate"] = _split(options["pregenerate"], index, processes)
+    if options["max_connections"]:
+        shard["max_connections"] = max(
+            _split(options["max_connections"], index, processes), 1
+        )
+    if options["replay"]:
+        shard["replay_shard"] = (index, processes)
+    shard["line_shard"] = (index, processes)
+    if options["output"]:
+        shard["output"] = shard_path(options["output"], index)
+    if options["rate"]:
+        shard["rate"] = options["rate"] / processes
+    if options["profile"]:
+        # Concurrency shares are whole workers, so they add up to the target.
+        shard["profile"] = [
+            dict(
+                stage,
+                target=(
+                    stage["target"] / processes
+                    if stage["kind"] == "rate"
+                    else _split(int(stage["target"]), index, processes)
+                ),
+            )
+            for stage in options["profile"]
+        ]
+    return shard
+
+
+async def run_processes(
+    target: Callable,
+    options: Dict,
+    processes: int,
+    on_progress: Optional[Callable[[int, Dict], None]] = None,
+) -> Tuple[Dict, float]:
+    """
+    Run ``target(shard, index, status_queue)`` in ``processes`` processes and
+    merge the stats they send back. ``on_progress`` gets the index and the
+    latest stats snapshot of a process whenever it reports in.
+    """
+    context = multiprocessing.get_context("spawn")
+    status_queue = context.Queue()
+    workers = [
+        context.Process(
+            target=target,
+            args=(shard_options(options, index, processes), index, status_queue),
+        )
+        for index in range(processes)
+    ]
+    for process in workers:
+        process.start()
+
+    snapshots = {}
+    durations = []
+    suspects = set()
+    try:
+        while len(snapshots) < processes:
+            try:
+                message = await asyncio.to_thread(
+                    status_queue.get, True, PROGRESS_INTERVAL
+                )
+            except queue.Empty:
+                dead = {
+                    index
+                    for index, process in enumerate(workers)
+                    if index not in snapshots and not process.is_alive()
+                }
+                # Give a process that just exited one more poll to flush.
+                if dead & suspects:
+                    index = min(dead & suspects)
+                    raise RuntimeError(
+                        f"worker process {index} exited with code {workers[index].exitcode}"
+                    )
+                suspects = dead
+                continue
+
+            kind, index, *payload = message
+            if kind == "error":
+                raise RuntimeError(f"worker process {index} failed:\n{payload[0]}")
+            if kind == "done":
+                snapshot, duration = payload
+                snapshots[index] = snapshot
+                durations.append(duration)
+            else:
+                snapshot = payload[0]
+            if on_progress:
+                on_progress(index, snapshot)
+    finally:
+        for process in workers:
+            if process.is_alive() and len(snapshots) < processes:
+                process.terminate()
+            process.join()
+
+    return merge_snapshots(snapshots), max(durations)
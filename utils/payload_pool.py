@@ -0,0 +1,209 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from utils.line_file import set_line_shard
+from utils.multipart import compile_multipart
+from utils.prebuilt_body import compile_body
+from utils.random_engine import reseed, seed_all
+from utils.replace_placeholders import compile_template, faker_cache_stats
+from utils.scenario import endpoint_picker
+from utils.stats import merge_faker_cache
+
+BATCH_SIZE = 32
+
+# Renderer used by the generator pool, set up once per worker process/thread.
+_render = None
+
+
+def compile_request(
+    url, method, payload=None, headers=None, post_type="json", prebuilt=False
+):
+    """
+    Compile the templates of one request into a renderer returning
+    ``(url, payload, headers)``. GET requests never render the payload;
+    with ``prebuilt`` the payload comes back as the encoded body bytes.
+    Multipart payloads always come back as a MultipartBody.
+    """
+    url_template = compile_template(url)
+    payload_template = None
+    if payload and method == "POST":
+        if post_type == "multipart":
+            payload_template = compile_multipart(payload)
+        elif prebuilt:
+            payload_template = compile_body(payload, post_type)
+        else:
+            payload_template = compile_template(payload)
+    headers_template = compile_template(headers) if headers else None
+
+    def render():
+        return (
+            url_template(),
+            payload_template() if payload_template else {},
+            headers_template() if headers_template else {},
+        )
+
+    return render
+
+
+def compile_endpoints(endpoints, prebuilt=False):
+    """
+    Renderer for a weighted mix of endpoints (see utils.scenario) returning
+    ``(endpoint_index, url, payload, headers)``.
+    """
+    renderers = [
+        compile_request(
+            e["url"], e["method"], e["payload"], e["headers"], e["post_type"], prebuilt
+        )
+        for e in endpoints
+    ]
+    pick = endpoint_picker(endpoints)
+
+    def render():
+        index = pick()
+        return (index, *renderers[index]())
+
+    return render
+
+
+def _init_generator(endpoints, prebuilt, seed=None, workers=None, line_shard=None):
+    global _render
+    if workers is None:
+        # Generator threads share this process's engine.
+        if seed is not None:
+            seed_all(*seed)
+    else:
+        # A forked process starts with a copy of the parent's random state,
+        # so every generator process draws its own sequence.
+        with workers.get_lock():
+            index = workers.value
+            workers.value += 1
+        if seed is None:
+            reseed()
+        else:
+            seed_all(*seed, worker=index)
+        if line_shard:
+            # Generator processes split their process's pick_line share.
+            shard, shards, line_seed, pool_size = line_shard
+            set_line_shard(shard * pool_size + index, shards * pool_size, line_seed)
+    _render = compile_endpoints(endpoints, prebuilt)
+
+
+def _render_batch(size):
+    # The cache counters ride along: a process worker's stay in its process.
+    return os.getpid(), faker_cache_stats(), [_render() for _ in range(size)]
+
+
+class InlinePayloads:
+    """Renders each request on the event loop when it is about to be sent."""
+
+    def __init__(self, endpoints, prebuilt=False):
+        self.render = compile_endpoints(endpoints, prebuilt)
+
+    async def start(self, pregenerate=0):
+        pass
+
+    async def get(self):
+        return self.render()
+
+    def faker_cache(self):
+        return faker_cache_stats()
+
+    async def stop(self):
+        pass
+
+
+class PayloadPool:
+    """
+    Renders requests ahead of time in a thread or process pool and hands
+    them to the workers through a bounded queue, so Faker and friends never
+    run on the event loop. ``seed`` ``(value, stream)`` reseeds each worker;
+    generator processes each get their own sequence, seeded or not.
+    ``line_shard`` ``(index, count, seed)`` is the process's pick_line share
+    (see utils.line_file.set_line_shard), split between generator processes.
+    """
+
+    def __init__(
+        self,
+        endpoints,
+        prebuilt=False,
+        mode="thread",
+        workers=1,
+        buffer_size=1024,
+        seed=None,
+        line_shard=None,
+    ):
+        if mode == "process":
+            executor_class = ProcessPoolExecutor
+            # Hands each generator process its index, see _init_generator.
+            counter = multiprocessing.Value("i", 0)
+        else:
+            executor_class, counter = ThreadPoolExecutor, None
+        self.executor = executor_class(
+            max_workers=workers,
+            initializer=_init_generator,
+            initargs=(
+                endpoints,
+                prebuilt,
+                seed,
+                counter,
+                (*line_shard, workers) if line_shard else None,
+            ),
+        )
+        self.mode = mode
+        self.workers = workers
+        # Latest Faker cache counters of each generator process, by pid.
+        self.worker_caches = {}
+        self.buffer_size = buffer_size
+        self.queue = None
+        self.producers = []
+
+    async def start(self, pregenerate=0):
+        self.queue = asyncio.Queue(maxsize=max(self.buffer_size, pregenerate))
+        self.producers = [
+            asyncio.create_task(self._produce()) for _ in range(self.workers)
+        ]
+        while self.queue.qsize() < pregenerate:
+            if any(task.done() for task in self.producers):
+                break
+            await asyncio.sleep(0.01)
+
+    async def _produce(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                pid, counters, batch = await loop.run_in_executor(
+                    self.executor, _render_batch, BATCH_SIZE
+                )
+                self.worker_caches[pid] = counters
+                for item in batch:
+                    await self.queue.put(item)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self.queue.put(e)
+
+    async def get(self):
+        item = await self.queue.get()
+        if isinstance(item, Exception):
+            # Leave it in place so every other waiting worker fails too.
+            self.queue.put_nowait(item)
+            raise item
+        return item
+
+    def faker_cache(self):
+        """Cache counters of whichever processes rendered the payloads."""
+        if self.mode != "process":
+            return faker_cache_stats()
+        merged = {}
+        for counters in self.worker_caches.values():
+            merge_faker_cache(merged, counters)
+        return merged
+
+    async def stop(self):
+        for task in self.producers:
+            task.cancel()
+        await asyncio.gather(*self.producers, return_exceptions=True)
+        # Wait for the workers to exit: a --processes worker joins its child
+        # processes before the executor's own exit hook could stop them.
+        await asyncio.to_thread(self.executor.shutdown, True, cancel_futures=True)
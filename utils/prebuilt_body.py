@@ -0,0 +1,204 @@
+import json
+import string
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+from urllib.parse import parse_qsl, quote_plus
+import httpx
+from utils.replace_placeholders import _compile, compile_template
+
+CONTENT_TYPES = {
+    "json": "application/json",
+    "form": "application/x-www-form-urlencoded",
+}
+# multipart bodies are built by utils.multipart.
+POST_TYPES = (*CONTENT_TYPES, "multipart")
+# quote_plus for ASCII text as one str.translate: every character outside
+# quote's always-safe set becomes %XX, and space becomes +.
+_FORM_SAFE = string.ascii_letters + string.digits + "_.-~"
+_FORM_ESCAPES = {
+    c: "+" if c == 32 else f"%{c:02X}" for c in range(128) if chr(c) not in _FORM_SAFE
+}
+# Bench rounds the two paths alternate over, so drift hits both alike.
+BENCH_ROUNDS = 10
+
+
+def _dumps(value) -> str:
+    # Same settings httpx uses for ``json=``, so bodies are byte-identical.
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+
+
+def _form_value(value) -> str:
+    # httpx's primitive_value_to_str.
+    if value is True:
+        return "true"
+    elif value is False:
+        return "false"
+    elif value is None:
+        return ""
+    return str(value)
+
+
+def _quote_form(value: str) -> str:
+    return value.translate(_FORM_ESCAPES) if value.isascii() else quote_plus(value)
+
+
+def _json_parts(obj, depth: int, parts: List) -> None:
+    if depth <= 10 and isinstance(obj, dict):
+        parts.append("{")
+        for i, (key, value) in enumerate(obj.items()):
+            parts.append(("," if i else "") + _dumps(key) + ":")
+            _json_parts(value, depth + 1, parts)
+        parts.append("}")
+    elif depth <= 10 and isinstance(obj, list):
+        parts.append("[")
+        for i, value in enumerate(obj):
+            if i:
+                parts.append(",")
+            _json_parts(value, depth + 1, parts)
+        parts.append("]")
+    else:
+        value, static = _compile(obj, depth)
+        parts.append(_dumps(value) if static else value)
+
+
+def _form_parts(obj: Dict, parts: List) -> None:
+    for key, value in obj.items():
+        prefix = quote_plus(str(key)) + "="
+        value, static = _compile(value, 1)
+        if static:
+            parts.append(prefix + quote_plus(_form_value(value)))
+        else:
+            parts.append(_form_field(prefix, value))
+
+
+def _form_field(prefix: str, render: Callable) -> Callable[[], str]:
+    def encode():
+        value = render()
+        if type(value) is str:
+            return prefix + _quote_form(value)
+        if isinstance(value, (list, tuple)):
+            return "&".join(prefix + _quote_form(_form_value(v)) for v in value)
+        return prefix + _quote_form(_form_value(value))
+
+    return encode
+
+
+def _splice(parts: List, separator: str):
+    """Merge neighbouring static parts; return the chunks and the slot offsets."""
+    chunks = []
+    slots = []
+    pending = []
+    for part in parts:
+        if callable(part):
+            if pending:
+                chunks.append(separator.join(pending).encode())
+                pending = []
+            slots.append((len(chunks), part))
+            chunks.append(b"")
+        else:
+            pending.append(part)
+    if pending:
+        chunks.append(separator.join(pending).encode())
+    return chunks, slots
+
+
+def compile_body(payload, post_type: str = "json") -> Callable[[], bytes]:
+    """
+    Serialize a payload template to bytes once and return a renderer that
+    only splices the freshly generated, escaped values between the static
+    chunks. Output matches what httpx sends for ``json=``/``data=``.
+    """
+    parts = []
+    if post_type == "json":
+        _json_parts(payload, 0, parts)
+        chunks, slots = _splice(parts, "")
+    else:
+        _form_parts(payload, parts)
+        chunks, slots = _splice(parts, "&")
+
+    if not slots:
+        body = b"".join(chunks) if post_type == "json" else b"&".join(chunks)
+        return lambda: body
+
+    if post_type == "json":
+
+        def render():
+            out = chunks.copy()
+            for offset, generator in slots:
+                out[offset] = _dumps(generator()).encode()
+            return b"".join(out)
+
+    else:
+
+        def render():
+            out = chunks.copy()
+            for offset, generator in slots:
+                out[offset] = generator().encode()
+            # A list field may expand to no pairs at all.
+            return b"&".join(chunk for chunk in out if chunk)
+
+    return render
+
+
+def decode_body(body: bytes):
+    """Best-effort dict form of a prebuilt body, for printing and parsers."""
+    try:
+        return json.loads(body)
+    except ValueError:
+        return dict(parse_qsl(body.decode(errors="replace"), keep_blank_values=True))
+
+
+def measure_body_encoding(
+    payload, post_type: str = "json", requests: int = 1000
+) -> Dict[str, Dict[str, float]]:
+    """
+    CPU time and peak allocation per request for the dict path (render a
+    dict, let httpx encode it) versus the prebuilt byte-splicing path, both
+    up to a ready ``httpx.Request``. ``values`` only renders the dict; it is
+    what both paths spend generating, so the rest is encoding.
+    """
+    template = compile_template(payload)
+    body = compile_body(payload, post_type)
+    field = "json" if post_type == "json" else "data"
+
+    def dict_path():
+        return httpx.Request("POST", "http://localhost/", **{field: template()})
+
+    def prebuilt_path():
+        return httpx.Request(
+            "POST",
+            "http://localhost/",
+            content=body(),
+            headers={"content-type": CONTENT_TYPES[post_type]},
+        )
+
+    paths = {"dict": dict_path, "prebuilt": prebuilt_path, "values": template}
+    # Warm the generators' caches first; the paths then take turns.
+    for render in paths.values():
+        render()
+    cpu = dict.fromkeys(paths, 0.0)
+    rounds = min(BENCH_ROUNDS, requests)
+    for index in range(rounds):
+        batch = requests // rounds + (1 if index < requests % rounds else 0)
+        for name, render in paths.items():
+            start = time.process_time()
+            for _ in range(batch):
+                render()
+            cpu[name] += time.process_time() - start
+
+    results = {}
+    for name, render in paths.items():
+        tracemalloc.start()
+        peak_total = 0
+        for _ in range(min(requests, 200)):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            render()
+            peak_total += tracemalloc.get_traced_memory()[1] - before
+        tracemalloc.stop()
+        results[name] = {
+            "cpu_us": cpu[name] / requests * 1e6,
+            "peak_bytes": peak_total / min(requests, 200),
+        }
+    return results
@@ -0,0 +1,178 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Optional
+from rich.console import Console
+from utils.custom_parsers import (
+    custom_response_parsers,
+    custom_payload_parsers,
+    custom_headers_parsers,
+)
+from utils.multipart import MultipartBody
+from utils.prebuilt_body import decode_body
+
+# Sampled results waiting to be printed before new ones are dropped.
+QUEUE_SIZE = 1000
+
+
+def is_error(result: Dict) -> bool:
+    return not result["success"] or result["status_code"] >= 400
+
+
+class PrintSink:
+    """
+    Output of --print-payload/--print-headers/--print-response. Workers
+    only sample a result and drop it into a bounded queue; a consumer task
+    runs the custom parsers and renders each entry on a background thread.
+    When the terminal falls behind, results are dropped and counted rather
+    than waited for, so printing never slows the requests down. A parser
+    that raises costs only its own entry, counted as failed.
+
+    Sampling: ``errors_only`` keeps failures and 4xx/5xx responses; of
+    those, ``every`` prints every N-th and ``first`` the first K per status
+    code (or error type). With neither, everything is printed.
+    """
+
+    def __init__(
+        self,
+        console: Console,
+        payload: bool,
+        headers: bool,
+        response: bool,
+        every: Optional[int] = None,
+        first: Optional[int] = None,
+        errors_only: bool = False,
+        queue_size: int = QUEUE_SIZE,
+    ):
+        self.console = console
+        self.payload = payload
+        self.headers = headers
+        self.response = response
+        self.every = every
+        self.first = first
+        self.errors_only = errors_only
+        self.queue = asyncio.Queue(queue_size)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.consumer = None
+        self.per_status = {}
+        self.matched = 0
+        self.sampled = 0
+        self.printed = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        self.consumer = asyncio.create_task(self._drain())
+
+    def offer(self, result: Dict) -> None:
+        if self.errors_only and not is_error(result):
+            return
+        self.matched += 1
+        key = result["status_code"] if result["success"] else result["error_type"]
+        seen = self.per_status[key] = self.per_status.get(key, 0) + 1
+        if self.every or self.first:
+            if not (
+                (self.every and self.matched % self.every == 0)
+                or (self.first and seen <= self.first)
+            ):
+                return
+        self.sampled += 1
+        try:
+            self.queue.put_nowait((datetime.now(), result))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _drain(self) -> None:
+        loop = asyncio.get_running_loop()
+        while (entry := await self.queue.get()) is not None:
+            try:
+                await loop.run_in_executor(self.executor, self._render, *entry)
+            except Exception as e:
+                self.failed += 1
+                if self.failed == 1:
+                    self.console.print(
+                        f"[bold red]Printing a result failed:[/] {type(e).__name__}: {e}"
+                        " [dim](further failures are only counted)[/]"
+                    )
+                continue
+            self.printed += 1
+
+    async def close(self) -> None:
+        """Print what is still queued, then stop."""
+        if self.consumer:
+            if self.consumer.done():
+                # Nothing is left to print the queue, so it is dropped.
+                self.dropped += self.queue.qsize()
+            else:
+                await self.queue.put(None)
+                await self.consumer
+        self.executor.shutdown()
+
+    def counts(self) -> Dict:
+        return {
+            "sampled": self.sampled,
+            "printed": self.printed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def _render(self, when: datetime, result: Dict) -> None:
+        timestamp = when.strftime("%H:%M:%S")
+        console = self.console
+        if result["success"]:
+            status_code = result["status_code"]
+        else:
+            status_code = result["error_type"]
+            console.print(
+                f"[[bold cyan]{timestamp}[/bold cyan] • [bold red]Error[/bold red] • {status_code}]\n- {result['error']}",
+                justify="left",
+            )
+
+        if self.headers:
+            parser = custom_headers_parsers.get(
+                status_code, custom_headers_parsers.get("all")
+            )
+            output = (
+                parser(result["final_headers"])
+                if parser
+                else "- Not found in `custom_headers_parsers`"
+            )
+            console.print(
+                f"[[bold cyan]{timestamp}[/bold cyan] • [bold magenta]Headers[/bold magenta] • [bold green]{status_code}[/bold green]]\n{output}",
+                justify="left",
+            )
+
+        if self.payload:
+            parser = custom_payload_parsers.get(
+                status_code, custom_payload_parsers.get("all")
+            )
+            final_payload = result["final_payload"]
+            if isinstance(final_payload, MultipartBody):
+                final_payload = final_payload.describe()
+            elif isinstance(final_payload, bytes):
+                final_payload = decode_body(final_payload)
+            output = (
+                parser(final_payload)
+                if parser
+                else "- Not Found in 'custom_payload_parsers'"
+            )
+            console.print(
+                f"[{timestamp} • [yellow]Payload[/yellow] • {status_code}]\n{output}",
+                justify="left",
+            )
+
+        if self.response and result["success"]:
+            parser = custom_response_parsers.get(
+                status_code, custom_response_parsers.get("all")
+            )
+            output = (
+                parser(result["response"])
+                if parser
+                else "- Not found in `custom_response_parsers`"
+            )
+            console.print(
+                f"[{timestamp} • [yellow]Response[/yellow] • {status_code}]\n{output}",
+                justify="left",
+            )
+
+        console.print("\n")
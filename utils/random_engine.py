@@ -0,0 +1,138 @@
+import os
+import random
+import threading
+from typing import Optional
+from faker import Faker
+from faker.generator import random as faker_random
+
+# Random bytes fetched per refill, and characters mapped per charset refill.
+BUFFER_SIZE = 1 << 16
+POOL_SIZE = 4096
+
+
+def _translation(charset: str):
+    """
+    ``bytes.translate`` arguments mapping random bytes onto ``charset``
+    without modulo bias: bytes past the last whole multiple are dropped.
+    """
+    size = len(charset)
+    limit = 256 - 256 % size
+    table = bytes(ord(charset[b % size]) if b < limit else 0 for b in range(256))
+    return table, bytes(range(limit, 256)), limit / 256
+
+
+class RandomEngine:
+    """
+    Random values for the templates. Characters are mapped from bulk random
+    bytes in batches (one ``translate`` call per few thousand characters)
+    and handed out as slices, instead of one ``secrets.choice`` per
+    character. Unseeded, the bytes come from ``os.urandom``; after
+    ``seed()`` everything comes from one seeded ``random.Random``.
+    """
+
+    def __init__(self):
+        self.random = random.Random()
+        self._lock = threading.Lock()
+        self.seed(None)
+
+    def seed(self, value=None) -> None:
+        with self._lock:
+            self.seeded = value is not None
+            self.value = value
+            self.random.seed(value)
+            self._buffer = b""
+            self._position = 0
+            self._pools = {}
+            self._translations = {}
+
+    def _bytes(self, count: int) -> bytes:
+        if self._position + count > len(self._buffer):
+            size = max(BUFFER_SIZE, count)
+            self._buffer = (
+                self.random.randbytes(size) if self.seeded else os.urandom(size)
+            )
+            self._position = 0
+        start = self._position
+        self._position += count
+        return self._buffer[start : self._position]
+
+    def bytes(self, count: int) -> bytes:
+        with self._lock:
+            return self._bytes(count)
+
+    def _map(self, charset: str, count: int) -> str:
+        if charset not in self._translations:
+            self._translations[charset] = _translation(charset)
+        table, rejected, accepted = self._translations[charset]
+        chunks = []
+        while count > 0:
+            chunk = self._bytes(int(count / accepted) + 16).translate(table, rejected)
+            chunks.append(chunk[:count])
+            count -= len(chunk)
+        return b"".join(chunks).decode("ascii")
+
+    def chars(self, charset: str, length: int) -> str:
+        """``length`` characters drawn uniformly from the ASCII ``charset``."""
+        with self._lock:
+            pool = self._pools.get(charset)
+            if pool is None or pool[1] + length > len(pool[0]):
+                pool = self._pools[charset] = [
+                    self._map(charset, max(POOL_SIZE, length)),
+                    0,
+                ]
+            start = pool[1]
+            pool[1] += length
+            return pool[0][start : pool[1]]
+
+
+engine = RandomEngine()
+# Children forked since the last seed_all, see _after_fork_in_child.
+_forks = 0
+
+
+def seed_all(value, stream: int = 0, worker: Optional[int] = None) -> None:
+    """
+    Seed the template engine, Faker and ``random`` for a reproducible run.
+    ``stream`` (the process index) gives each process its own sequence, and
+    ``worker`` each generator process within it.
+    """
+    global _forks
+    _forks = 0
+    derived = f"{value}:{stream}" if worker is None else f"{value}:{stream}.{worker}"
+    _seed_derived(derived)
+
+
+def _seed_derived(derived: str) -> None:
+    engine.seed(derived)
+    random.seed(derived)
+    Faker.seed(derived)
+
+
+def reseed() -> None:
+    """Fresh OS entropy for the template engine and Faker's shared RNG."""
+    engine.seed(None)
+    faker_random.seed()
+
+
+def _after_fork_in_parent() -> None:
+    global _forks
+    _forks += 1
+
+
+def _after_fork_in_child() -> None:
+    """
+    A forked child starts with a copy of the parent's random state and
+    would repeat its values. Unseeded, it draws fresh entropy; seeded, the
+    n-th child since seed_all continues from its own derived seed.
+    """
+    # The fork may have copied the lock while another thread held it.
+    engine._lock = threading.Lock()
+    if engine.seeded:
+        _seed_derived(f"{engine.value}/{_forks}")
+    else:
+        reseed()
+
+
+os.register_at_fork(
+    after_in_parent=_after_fork_in_parent, after_in_child=_after_fork_in_child
+)
@@ -1,38 +1,56 @@
+import os
 import string
 import secrets
-import random
+from utils.line_file import get_line_file
+from utils.random_engine import engine
 
+ALPHANUMERIC = string.ascii_letters + string.digits
 
-def generate_random_email(prefix="Brainless_Dip+", length=10, domains=None):
+
+def random_chars(charset, length, secure=False):
+    """
+    ``length`` characters of ``charset``. ``secure`` always draws from
+    ``secrets``, even when the run is seeded.
+    """
+    if secure:
+        return "".join(secrets.choice(charset) for _ in range(length))
+    return engine.chars(charset, length)
+
+
+def generate_random_email(
+    prefix="Brainless_Dip+", length=10, domains=None, secure=False
+):
     if domains is None:
         domains = ["gmail.com"]
-    charset = string.ascii_letters + string.digits
-    random_part = "".join(secrets.choice(charset) for _ in range(length))
-    domain = secrets.choice(domains)
+    random_part = random_chars(ALPHANUMERIC, length, secure)
+    domain = secrets.choice(domains) if secure else engine.random.choice(domains)
     return f"{prefix}{random_part}@{domain}"
 
 
-def generate_random_number(start="013", length=8):
+def generate_random_number(start="013", length=8, secure=False):
     if len(start) > length:
         raise ValueError(
             f"The 'start' string has a length of {len(start)}, which exceeds the maximum allowed length of {length}"
         )
-    digits = "0123456789"
-    rest = "".join(secrets.choice(digits) for _ in range(length - len(start)))
+    rest = random_chars(string.digits, length - len(start), secure)
     return f"{start}{rest}"
 
 
-def generate_random_string(length=8):
-    charset = string.ascii_letters + string.digits
-    return "".join(secrets.choice(charset) for _ in range(length))
+def generate_random_string(length=8, secure=False):
+    return random_chars(ALPHANUMERIC, length, secure)
 
 
 def generate_random_float(min_val, max_val, precision=2):
-    return str(round(random.uniform(min_val, max_val), precision))
+    return str(round(engine.random.uniform(min_val, max_val), precision))
 
 
 def generate_password(
-    length=12, uppercase=True, lowercase=True, digits=True, symbols=False
+    length=12,
+    uppercase=True,
+    lowercase=True,
+    digits=True,
+    symbols=False,
+    secure=False,
 ):
     charset = ""
     if uppercase:
@@ -46,18 +64,16 @@ def generate_password(
 
     if not charset:
         return "[Invalid password settings: no character sets enabled]"
-    return "".join(secrets.choice(charset) for _ in range(length))
-
-
-# Global cache to store file content
-cache = {}
+    return random_chars(charset, length, secure)
 
 
-def pick_line(file):
-    if file not in cache:
-        try:
-            with open(file, "r") as file:
-                cache[file] = file.readlines()
-        except Exception as e:
-            return str(e)
-    return random.choice(cache[file]).strip()
+def pick_line(file, mode="random", index=False):
+    """
+    A line of ``file``: random, ``sequential`` (wrapping) or ``unique`` (no
+    repeats until every line was used). With ``index`` the line offsets are
+    saved next to the file and reused by later runs and worker processes.
+    """
+    try:
+        return get_line_file(os.path.abspath(file), index).pick(mode)
+    except Exception as e:
+        return str(e)
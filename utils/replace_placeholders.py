@@ -1,11 +1,13 @@
 import re
-import random
 import uuid
 import time
 import ast
 from datetime import datetime
+from functools import lru_cache, partial
 from faker import Faker
 from utils.custom_providers import SimpleExampleProvider, AdvancedExampleProvider
+from utils.line_file import PICK_MODES
+from utils.random_engine import engine
 from utils.random_functions import (
     generate_random_email,
     generate_random_number,
@@ -21,122 +23,277 @@ CHOICE_PATTERN = re.compile(r"choice\((.*?)\)")
 FAKER_PATTERN = re.compile(r"faker\.((providers\.[\w\.]+)|[\w_]+)(\((.*?)\))?")
 PROVIDER_PATTERN = re.compile(r"providers\.([\w\.]+)")
 
+FAKER_CACHE_SIZE = 16
+PROVIDER_CACHE_SIZE = 256
+
 faker = Faker()
 faker.add_provider(SimpleExampleProvider)
 faker.add_provider(AdvancedExampleProvider)
 
 
+@lru_cache(maxsize=FAKER_CACHE_SIZE)
+def get_faker(locale):
+    """Shared Faker instance for a locale, built on first use."""
+    return Faker(locale)
+
+
+@lru_cache(maxsize=PROVIDER_CACHE_SIZE)
+def get_provider_method(module, method_name, locale=None):
+    """Resolve ``faker.providers.<module>.<method_name>`` once per locale."""
+    fake = get_faker(locale) if locale else faker
+    provider = __import__(module, fromlist=["Provider"]).Provider
+    return getattr(provider(fake), method_name)
+
+
+def faker_cache_stats():
+    """Hit/miss counters of this process's Faker and provider registries."""
+    return {
+        "locales": get_faker.cache_info()._asdict(),
+        "providers": get_provider_method.cache_info()._asdict(),
+    }
+
+
 def parse_args(content):
     return dict(ARGS_PATTERN.findall(content))
 
 
 def replace_placeholders(obj, _depth=0):
-    if _depth > 10:
-        return obj
+    """Render a template once. Prefer compile_template when rendering repeatedly."""
+    return compile_template(obj, _depth)()
+
+
+def compile_template(obj, _depth=0):
+    """
+    Compile a payload, headers or URL template into a zero-argument callable.
+
+    Placeholders and their arguments are parsed once here; every call of the
+    returned function only runs the generators and yields the same output
+    replace_placeholders always produced.
+    """
+    value, static = _compile(obj, _depth)
+    if static:
+        return lambda: value
+    return value
+
+
+def _compile(obj, depth):
+    """Return ``(value, static)``; when not static, ``value`` is a renderer."""
+    if depth > 10:
+        return obj, True
 
     if isinstance(obj, dict):
-        return {k: replace_placeholders(v, _depth + 1) for k, v in obj.items()}
+        items = [(k, *_compile(v, depth + 1)) for k, v in obj.items()]
+        return lambda: {k: v if static else v() for k, v, static in items}, False
     elif isinstance(obj, list):
-        return [replace_placeholders(i, _depth + 1) for i in obj]
+        items = [_compile(i, depth + 1) for i in obj]
+        return lambda: [v if static else v() for v, static in items], False
     elif not isinstance(obj, str):
-        return obj
+        return obj, True
 
     if "{" not in obj or "}" not in obj:
-        return obj
+        return obj, True
 
-    def repl(match):
+    return _compile_string(obj)
+
+
+def _compile_string(text):
+    parts = []
+    slots = []
+    pos = 0
+
+    for match in PLACEHOLDER_PATTERN.finditer(text):
+        literal = text[pos : match.start()]
+        pos = match.end()
+        if "{" in literal or "}" in literal:
+            # Stray braces may pair up with generated values (nested
+            # placeholders), so this string needs the full rescanning loop.
+            return partial(_expand, text), False
+
+        parts.append(literal)
         content = match.group(1).strip()
+        try:
+            generator = _compile_placeholder(content, match.group(0))
+        except Exception:
+            # Bad arguments keep failing at render time, like they used to.
+            generator = partial(_render_placeholder, content, match.group(0))
+
+        if callable(generator):
+            slots.append((len(parts), generator))
+            parts.append("")
+        else:
+            parts.append(generator)
+
+    literal = text[pos:]
+    if "{" in literal or "}" in literal:
+        return partial(_expand, text), False
+    parts.append(literal)
+
+    if not slots:
+        return "".join(parts), True
+
+    if len(slots) == 1 and len(parts) == 3 and not parts[0] and not parts[2]:
+        generator = slots[0][1]
+
+        def render_single():
+            value = generator()
+            if "{" in value or "}" in value:
+                return _expand(value)
+            return value
+
+        return render_single, False
+
+    def render():
+        out = parts.copy()
+        rescan = False
+        for index, generator in slots:
+            value = generator()
+            if "{" in value or "}" in value:
+                rescan = True
+            out[index] = value
+        result = "".join(out)
+        return _expand(result) if rescan else result
+
+    return render, False
+
 
-        if content == "uuid":
-            return str(uuid.uuid4())
-        elif content == "timestamp":
-            return str(int(time.time()))
-        elif content == "bool":
-            return str(random.choice([True, False]))
-        elif content == "ip":
-            return f"{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(0, 255)}"
-
-        if content.startswith(
-            ("email", "number", "str", "string", "int", "float", "password")
-        ):
-            args = parse_args(content)
-
-            if content.startswith("email"):
-                return generate_random_email(
-                    prefix=args.get("prefix", "Human"),
-                    length=int(args.get("length", 5)),
-                    domains=args.get("domains", "gmail.com").split("*"),
-                )
-            elif content.startswith("number"):
-                return generate_random_number(
-                    args.get("start", "019"), int(args.get("length", 11))
-                )
-            elif content.startswith(("str", "string")):
-                return generate_random_string(int(args.get("length", 8)))
-            elif content.startswith("int"):
-                return str(
-                    random.randint(int(args.get("min", 1)), int(args.get("max", 100)))
-                )
-            elif content.startswith("float"):
-                return generate_random_float(
-                    float(args.get("min", 0)),
-                    float(args.get("max", 1)),
-                    int(args.get("precision", 2)),
-                )
-            elif content.startswith("password"):
-                return generate_password(
-                    length=int(args.get("length", 8)),
-                    uppercase=args.get("uppercase", "true").lower() == "true",
-                    lowercase=args.get("lowercase", "true").lower() == "true",
-                    digits=args.get("digits", "true").lower() == "true",
-                    symbols=args.get("symbols", "false").lower() == "true",
-                )
-
-        elif content.startswith("pick_line"):
-            args = parse_args(content)
-            return str(pick_line(args.get("file")))
-
-        elif content.startswith("choice"):
-            choices = CHOICE_PATTERN.search(content)
-            if choices:
-                return random.choice([x.strip() for x in choices.group(1).split(",")])
-
-        elif content.startswith("date"):
-            args = parse_args(content)
-            return datetime.now().strftime(args.get("format", "%Y-%m-%d"))
-
-        elif content.startswith("faker."):
-            return handle_faker_content(content)
-
-        return match.group(0)
+def _expand(text):
+    def repl(match):
+        return _render_placeholder(match.group(1).strip(), match.group(0))
 
     while True:
-        new_obj = PLACEHOLDER_PATTERN.sub(repl, obj)
-        if new_obj == obj:
+        new_text = PLACEHOLDER_PATTERN.sub(repl, text)
+        if new_text == text:
             break
-        obj = new_obj
+        text = new_text
+
+    return text
+
+
+def _render_placeholder(content, raw):
+    generator = _compile_placeholder(content, raw)
+    return generator() if callable(generator) else generator
+
+
+def _compile_placeholder(content, raw):
+    """Return a generator for one placeholder, or a plain string if it is static."""
+    if content == "uuid":
+        return lambda: str(uuid.UUID(bytes=engine.bytes(16), version=4))
+    elif content == "timestamp":
+        return lambda: str(int(time.time()))
+    elif content == "bool":
+        return lambda: str(engine.random.choice([True, False]))
+    elif content == "ip":
+        return lambda: ".".join(map(str, engine.bytes(4)))
+
+    if content.startswith(
+        ("email", "number", "str", "string", "int", "float", "password")
+    ):
+        args = parse_args(content)
+        secure = args.get("secure", "false").lower() == "true"
 
-    return obj
+        if content.startswith("email"):
+            return partial(
+                generate_random_email,
+                prefix=args.get("prefix", "Human"),
+                length=int(args.get("length", 5)),
+                domains=args.get("domains", "gmail.com").split("*"),
+                secure=secure,
+            )
+        elif content.startswith("number"):
+            return partial(
+                generate_random_number,
+                args.get("start", "019"),
+                int(args.get("length", 11)),
+                secure,
+            )
+        elif content.startswith(("str", "string")):
+            return partial(generate_random_string, int(args.get("length", 8)), secure)
+        elif content.startswith("int"):
+            low, high = int(args.get("min", 1)), int(args.get("max", 100))
+            randint = engine.random.randint
+            return lambda: str(randint(low, high))
+        elif content.startswith("float"):
+            return partial(
+                generate_random_float,
+                float(args.get("min", 0)),
+                float(args.get("max", 1)),
+                int(args.get("precision", 2)),
+            )
+        elif content.startswith("password"):
+            return partial(
+                generate_password,
+                length=int(args.get("length", 8)),
+                uppercase=args.get("uppercase", "true").lower() == "true",
+                lowercase=args.get("lowercase", "true").lower() == "true",
+                digits=args.get("digits", "true").lower() == "true",
+                symbols=args.get("symbols", "false").lower() == "true",
+                secure=secure,
+            )
+
+    elif content.startswith("pick_line"):
+        args = parse_args(content)
+        mode = args.get("mode", "random").strip()
+        if mode not in PICK_MODES:
+            raise ValueError(f"pick_line mode must be one of {PICK_MODES}")
+        return partial(
+            pick_line,
+            args.get("file"),
+            mode,
+            args.get("index", "false").lower() == "true",
+        )
+
+    elif content.startswith("choice"):
+        choices = CHOICE_PATTERN.search(content)
+        if choices:
+            options = [x.strip() for x in choices.group(1).split(",")]
+            choice = engine.random.choice
+            return lambda: choice(options)
+
+    elif content.startswith("date"):
+        date_format = parse_args(content).get("format", "%Y-%m-%d")
+        return lambda: datetime.now().strftime(date_format)
+
+    elif content.startswith("faker."):
+        return compile_faker_content(content)
+
+    return raw
 
 
 def handle_faker_content(content):
     """Handler for faker-related placeholders"""
+    generator = compile_faker_content(content)
+    return generator() if callable(generator) else generator
+
+
+def compile_faker_content(content):
+    """Pre-parse a faker placeholder into a generator (or a static string)."""
     args = parse_args(content)
     locale = args.get("locale")
-    fake = Faker(locale) if locale else faker
+
+    def get_fake():
+        return get_faker(locale) if locale else faker
 
     if content.startswith("faker.profile"):
         field = args.get("field", "job")
-        try:
-            return str(fake.profile()[field])
-        except KeyError:
-            return f"[Invalid profile field: {field}]"
+
+        def profile():
+            try:
+                return str(get_fake().profile()[field])
+            except KeyError:
+                return f"[Invalid profile field: {field}]"
+
+        return profile
 
     if content.startswith("faker.custom"):
         field = args.get("field")
-        if field and hasattr(fake, field):
-            return str(getattr(fake, field)())
-        return f"[Invalid custom field: {field}]"
+
+        def custom():
+            fake = get_fake()
+            if field and hasattr(fake, field):
+                return str(getattr(fake, field)())
+            return f"[Invalid custom field: {field}]"
+
+        return custom
 
     match = FAKER_PATTERN.match(content)
     if not match:
@@ -154,19 +311,34 @@ def handle_faker_content(content):
                 kwargs[k] = v
 
     if full_path.startswith("providers."):
-        try:
-            provider_match = PROVIDER_PATTERN.match(full_path)
-            if provider_match:
-                provider_path = provider_match.group(1).split(".")
-                module = "faker.providers." + ".".join(provider_path[:-1])
-                method_name = provider_path[-1]
-                provider = __import__(module, fromlist=["Provider"]).Provider
-                method = getattr(provider(fake), method_name)
-                return str(method(**kwargs)) if callable(method) else str(method)
-        except Exception as e:
-            return f"[Provider error: {e}]"
-    elif hasattr(fake, full_path):
-        method = getattr(fake, full_path)
-        return str(method(**kwargs)) if callable(method) else str(method)
-
-    return f"[Invalid faker field: {full_path}]"
+        provider_match = PROVIDER_PATTERN.match(full_path)
+        if provider_match:
+            provider_path = provider_match.group(1).split(".")
+            module = "faker.providers." + ".".join(provider_path[:-1])
+            method_name = provider_path[-1]
+
+            def provider():
+                try:
+                    method = get_provider_method(module, method_name, locale)
+                    return str(method(**kwargs)) if callable(method) else str(method)
+                except Exception as e:
+                    return f"[Provider error: {e}]"
+
+            return provider
+        return f"[Invalid faker field: {full_path}]"
+
+    if not locale:
+        if not hasattr(faker, full_path):
+            return f"[Invalid faker field: {full_path}]"
+        method = getattr(faker, full_path)
+        if callable(method):
+            return lambda: str(method(**kwargs))
+
+    def field():
+        fake = get_fake()
+        if hasattr(fake, full_path):
+            method = getattr(fake, full_path)
+            return str(method(**kwargs)) if callable(method) else str(method)
+        return f"[Invalid faker field: {full_path}]"
+
+    return field
@@ -0,0 +1,104 @@
+import asyncio
+import base64
+import json
+import time
+from typing import Optional, Tuple
+from utils.prebuilt_body import _dumps
+from utils.scheduler import Job
+
+READ_BUFFER = 1 << 20
+
+
+def parse_record(line: bytes) -> Tuple[Optional[float], tuple]:
+    """
+    ``(timestamp, (method, url, body, headers))`` from one recorded request.
+    Object bodies are sent as JSON, strings as UTF-8 and ``body_base64`` as
+    raw bytes; the recorded headers are sent unchanged.
+    """
+    record = json.loads(line)
+    headers = record.get("headers") or {}
+    if "body_base64" in record:
+        body = base64.b64decode(record["body_base64"])
+    else:
+        body = record.get("body")
+        if isinstance(body, str):
+            body = body.encode()
+        elif body is not None:
+            body = _dumps(body).encode()
+            if not any(k.lower() == "content-type" for k in headers):
+                headers = {"content-type": "application/json", **headers}
+    timestamp = record.get("timestamp")
+    return (
+        float(timestamp) if timestamp is not None else None,
+        (record.get("method", "GET").upper(), record["url"], body, headers),
+    )
+
+
+class ReplayJobs:
+    """
+    Streams recorded requests from a JSONL file, one line at a time, so the
+    capture never has to fit in memory. With ``speed`` > 0 and timestamps
+    in the file, requests keep their recorded spacing (divided by
+    ``speed``) and are reported against their slots like RateJobs; with
+    ``speed`` 0 they go out as fast as the workers can send them.
+    ``shard`` ``(index, count)`` keeps every count-th line for one process.
+    Malformed lines are skipped and counted, with the first one kept as
+    ``path:line: error`` for the report.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, shard: Tuple[int, int] = (0, 1)):
+        self.path = path
+        self.speed = speed
+        self.shard_index, self.shard_count = shard
+        self.file = open(path, "rb", buffering=READ_BUFFER)
+        self.line_number = 0
+        self.issued = 0
+        self.skipped = 0
+        self.first_error = None
+        self.start = None
+        # Every shard measures time from the first request in the file.
+        self.first_timestamp = None
+        for line in self.file:
+            if line.strip():
+                try:
+                    self.first_timestamp = parse_record(line)[0]
+                except (ValueError, KeyError, TypeError):
+                    continue
+                break
+        self.file.seek(0)
+
+    def _read(self) -> Optional[Tuple[Optional[float], tuple]]:
+        for line in self.file:
+            self.line_number += 1
+            if not line.strip():
+                continue
+            if (self.line_number - 1) % self.shard_count != self.shard_index:
+                continue
+            try:
+                return parse_record(line)
+            except (ValueError, KeyError, TypeError) as e:
+                self.skipped += 1
+                if self.first_error is None:
+                    self.first_error = f"{self.path}:{self.line_number}: {e!r}"
+        self.file.close()
+        return None
+
+    async def next(self, worker_id: int = 0) -> Optional[Job]:
+        if self.file.closed:
+            return None
+        record = self._read()
+        if record is None:
+            return None
+        timestamp, request = record
+        self.issued += 1
+
+        now = time.perf_counter()
+        if self.start is None:
+            self.start = now
+        if not self.speed or timestamp is None:
+            return Job(self.issued - 1, request=request)
+
+        scheduled = self.start + (timestamp - (self.first_timestamp or 0)) / self.speed
+        if scheduled > now:
+            await asyncio.sleep(scheduled - now)
+        return Job(self.issued - 1, scheduled, request=request)
@@ -0,0 +1,124 @@
+import asyncio
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from utils.stats import PHASES
+
+OUTPUT_FORMATS = ("jsonl", "csv")
+FIELDS = (
+    "timestamp",
+    "worker",
+    "stage",
+    "endpoint",
+    "success",
+    "status_code",
+    "response_time",
+    "ttfb",
+    "schedule_lag",
+    "bytes",
+    "connection",
+    "error_type",
+    "error",
+    # Seconds per request phase; empty when the phase was not traced.
+    *(f"phase_{name}" for name in PHASES),
+)
+BATCH_SIZE = 1000
+# Batches handed to the writer thread before workers wait for it to catch up.
+MAX_PENDING_BATCHES = 8
+
+
+def output_format(path: str, format: Optional[str] = None) -> str:
+    """Explicit format, else ``csv`` for a .csv path and ``jsonl`` otherwise."""
+    if format:
+        return format
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def shard_path(path: str, index: int) -> str:
+    """``results.jsonl`` becomes ``results.<index>.jsonl`` for a worker process."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{index}{ext}"
+
+
+class ResultWriter:
+    """
+    Streams one record per request to a JSONL or CSV file. Workers only
+    append a tuple; full batches are serialized and written by a single
+    background thread, in order, so the event loop never touches the file.
+    """
+
+    def __init__(
+        self, path: str, format: Optional[str] = None, batch_size: int = BATCH_SIZE
+    ):
+        self.format = output_format(path, format)
+        self.batch_size = batch_size
+        self.file = open(path, "w", encoding="utf-8", newline="", buffering=1 << 20)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending = []
+        self.writes = deque()
+        self.written = 0
+        # perf_counter() to wall clock, so the hot path makes no extra calls.
+        self.clock_offset = time.time() - time.perf_counter()
+        if self.format == "csv":
+            self.csv = csv.writer(self.file)
+            self.csv.writerow(FIELDS)
+
+    async def write(self, worker_id: int, result: Dict) -> None:
+        self.pending.append(
+            (
+                result["sent_at"],
+                worker_id,
+                result.get("stage"),
+                result["endpoint"],
+                result["success"],
+                result["status_code"],
+                result["response_time"],
+                result["ttfb"],
+                result.get("schedule_lag"),
+                result["bytes"],
+                result["connection"],
+                result["error_type"],
+                result["error"],
+                *map(result["phases"].get, PHASES),
+            )
+        )
+        if len(self.pending) >= self.batch_size:
+            self._flush()
+            while self.writes and (
+                self.writes[0].done() or len(self.writes) > MAX_PENDING_BATCHES
+            ):
+                await self.writes.popleft()
+
+    def _flush(self) -> None:
+        batch, self.pending = self.pending, []
+        self.writes.append(
+            asyncio.get_running_loop().run_in_executor(
+                self.executor, self._write_batch, batch
+            )
+        )
+
+    def _write_batch(self, batch) -> None:
+        offset = self.clock_offset
+        if self.format == "csv":
+            self.csv.writerows((round(row[0] + offset, 6), *row[1:]) for row in batch)
+        else:
+            self.file.write(
+                "".join(
+                    json.dumps(dict(zip(FIELDS, (round(row[0] + offset, 6), *row[1:]))))
+                    + "\n"
+                    for row in batch
+                )
+            )
+        self.written += len(batch)
+
+    async def close(self) -> None:
+        if self.pending:
+            self._flush()
+        while self.writes:
+            await self.writes.popleft()
+        await asyncio.get_running_loop().run_in_executor(self.executor, self.file.close)
+        self.executor.shutdown()
@@ -0,0 +1,202 @@
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from rich.console import Console
+from rich.table import Table
+from rich.text import Text
+from utils.histogram import PERCENTILES
+
+SUMMARY_VERSION = 2
+SUMMARY_DIR = "runs"
+# run_load_test options worth keeping to tell runs apart.
+SUMMARY_OPTIONS = (
+    "url",
+    "method",
+    "num_requests",
+    "concurrency",
+    "rate",
+    "arrival",
+    "replay",
+    "post_type",
+    "processes",
+    "pipeline",
+    "http",
+    "max_connections",
+    "keepalive",
+    "h2_streams",
+    "generator",
+    "generator_workers",
+    "seed",
+)
+# Gated metric, summary path, the direction that counts as worse, and
+# whether its threshold is a relative change in percent (or an absolute
+# change in percentage points, for rates that may start at zero).
+GATED = {
+    "rps": (("success_rps",), -1, True),
+    "p99": (("latency", "p99"), 1, True),
+    "error_rate": (("error_rate",), 1, False),
+}
+
+
+def default_summary_path() -> str:
+    # Microseconds and the pid keep runs started together from colliding.
+    name = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{os.getpid()}.json"
+    return os.path.join(SUMMARY_DIR, name)
+
+
+def _latency(histogram) -> Dict[str, float]:
+    """
+    Milliseconds, rounded to the microsecond; empty without a single
+    success, so the comparison shows them missing rather than improved.
+    """
+    if not histogram.count:
+        return {}
+    values = {"mean": histogram.mean()}
+    values.update((f"p{p:g}", v) for p, v in histogram.percentiles().items())
+    values["max"] = histogram.max
+    return {key: round(value * 1000, 3) for key, value in values.items()}
+
+
+def build_summary(stats: Dict, total_time: float, config: Dict) -> Dict:
+    """Compact, JSON-friendly summary of a finished run."""
+    completed = stats["completed"]
+    cpu_time = stats["cpu_time"]
+    return {
+        "version": SUMMARY_VERSION,
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "config": config,
+        "duration": round(total_time, 3),
+        "requests": completed,
+        "rps": round(completed / total_time, 2) if total_time else 0.0,
+        # Failed requests are often the fastest; only successes count as load.
+        "success_rps": (
+            round(stats["success_count"] / total_time, 2) if total_time else 0.0
+        ),
+        "success": stats["success_count"],
+        "failed": stats["failure_count"],
+        "error_rate": (
+            round(stats["failure_count"] / completed, 6) if completed else 0.0
+        ),
+        "latency": _latency(stats["latency"]),
+        "ttfb": _latency(stats["ttfb"]),
+        "status_codes": {
+            str(code): count for code, count in sorted(stats["status_codes"].items())
+        },
+        "error_types": dict(stats["error_types"]),
+        "cpu_time": round(cpu_time, 3),
+        "rps_per_cpu": round(completed / cpu_time, 2) if cpu_time else None,
+    }
+
+
+def save_summary(summary: Dict, path: str) -> None:
+    """Raises FileExistsError rather than replacing an earlier summary."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "x", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+
+def load_summary(path: str) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        summary = json.load(f)
+    if "rps" not in summary or "latency" not in summary:
+        raise ValueError(f"{path} is not a run summary")
+    if "success_rps" not in summary:
+        # Version 1 summaries predate it.
+        duration = summary.get("duration")
+        summary["success_rps"] = (
+            round(summary.get("success", 0) / duration, 2) if duration else 0.0
+        )
+    return summary
+
+
+def _get(summary: Dict, path: Tuple[str, ...]) -> Optional[float]:
+    for key in path:
+        if not isinstance(summary, dict) or key not in summary:
+            return None
+        summary = summary[key]
+    return summary
+
+
+def _rows() -> List[Tuple[str, Tuple[str, ...]]]:
+    rows = [
+        ("RPS", ("rps",)),
+        ("Successful RPS", ("success_rps",)),
+        ("Requests", ("requests",)),
+        ("Failed", ("failed",)),
+        ("Error rate", ("error_rate",)),
+        ("Mean (ms)", ("latency", "mean")),
+    ]
+    rows += [(f"p{p:g} (ms)", ("latency", f"p{p:g}")) for p in PERCENTILES]
+    rows += [
+        ("Max (ms)", ("latency", "max")),
+        ("TTFB p99 (ms)", ("ttfb", "p99")),
+        ("CPU time (s)", ("cpu_time",)),
+        ("RPS per CPU-second", ("rps_per_cpu",)),
+    ]
+    return rows
+
+
+def compare_summaries(
+    before: Dict, after: Dict, thresholds: Dict[str, float], file: str
+) -> List[str]:
+    """
+    Print a before/after table of two summaries and return the regressions:
+    gated metrics (see GATED) that got worse by more than their threshold,
+    and a run without a single successful request.
+    """
+    console = Console()
+    table = Table(title=f"Run Comparison - {file}", show_lines=True, expand=True)
+    table.add_column("Metric", style="bold cyan", no_wrap=True)
+    table.add_column("Before", style="bold red", overflow="fold")
+    table.add_column("After", style="bold green", overflow="fold")
+    table.add_column("Change", overflow="fold")
+
+    gated = {path: (name, *rest) for name, (path, *rest) in GATED.items()}
+    regressions = []
+    if after.get("requests") and not after.get("success"):
+        regressions.append("no request succeeded")
+    for label, path in _rows():
+        before_val, after_val = _get(before, path), _get(after, path)
+        name, sign, relative = gated.get(path, (None, 1, True))
+        if before_val is None or after_val is None:
+            change = Text("<missing>", style="dim")
+        elif before_val == after_val:
+            change = Text("No differences", style="blue")
+        elif relative and not before_val:
+            change = Text("n/a", style="dim")
+        else:
+            if relative:
+                delta = (after_val - before_val) / before_val * 100
+                shown, unit = f"{delta:+.1f}%", "%"
+            else:
+                delta = (after_val - before_val) * 100
+                shown, unit = f"{delta:+.2f} pts", " pts"
+            style = "yellow"
+            if name:
+                if delta * sign > thresholds[name]:
+                    style = "bold red"
+                    regressions.append(
+                        f"{label} {shown} (limit {thresholds[name]:g}{unit})"
+                    )
+                else:
+                    style = "green"
+            change = Text(shown, style=style)
+        table.add_row(
+            label,
+            Text("<missing>" if before_val is None else str(before_val)),
+            Text("<missing>" if after_val is None else str(after_val)),
+            change,
+        )
+    console.print(table)
+
+    changed = [
+        f"{key} {before['config'].get(key)} → {value}"
+        for key, value in after.get("config", {}).items()
+        if key in before.get("config", {}) and before["config"][key] != value
+    ]
+    if changed:
+        console.print(f"[dim]Configuration differs: {', '.join(changed)}[/]")
+    return regressions
@@ -0,0 +1,80 @@
+import json
+import os
+from itertools import accumulate
+from typing import Callable, Dict, List, Optional, Union
+from utils.prebuilt_body import POST_TYPES
+from utils.random_engine import engine
+
+
+def endpoint(
+    url: str,
+    method: str = "GET",
+    payload: Optional[Dict] = None,
+    headers: Optional[Dict] = None,
+    post_type: str = "json",
+    name: Optional[str] = None,
+    weight: float = 1.0,
+) -> Dict:
+    return {
+        "name": name or f"{method} {url}",
+        "weight": float(weight),
+        "url": url,
+        "method": method,
+        "payload": payload,
+        "headers": headers,
+        "post_type": post_type,
+    }
+
+
+def _load_part(value: Union[str, Dict, None], base_dir: str) -> Optional[Dict]:
+    """Inline JSON object, or the path (relative to the scenario) of a JSON file."""
+    if value is None or isinstance(value, dict):
+        return value
+    with open(os.path.join(base_dir, value), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_scenario(data: Union[Dict, List], base_dir: str = ".") -> List[Dict]:
+    """
+    Normalize a scenario: a list of endpoints, each with a ``url`` and an
+    optional ``name``, ``weight``, ``method``, ``payload``, ``headers`` and
+    ``post_type``. Payloads and headers are objects or JSON file paths.
+    """
+    endpoints = data.get("endpoints", []) if isinstance(data, dict) else data
+    if not endpoints:
+        raise ValueError("scenario has no endpoints")
+
+    scenario = []
+    for i, spec in enumerate(endpoints, 1):
+        if "url" not in spec:
+            raise ValueError(f"endpoint {i} has no 'url'")
+        method = spec.get("method", "GET").upper()
+        if method not in ("GET", "POST"):
+            raise ValueError(f"endpoint {i} has unsupported method '{method}'")
+        post_type = spec.get("post_type", "json")
+        if post_type not in POST_TYPES:
+            raise ValueError(f"endpoint {i} has unknown post_type '{post_type}'")
+        weight = float(spec.get("weight", 1))
+        if weight <= 0:
+            raise ValueError(f"endpoint {i} needs a positive weight")
+        scenario.append(
+            endpoint(
+                spec["url"],
+                method,
+                _load_part(spec.get("payload"), base_dir),
+                _load_part(spec.get("headers"), base_dir),
+                post_type,
+                spec.get("name"),
+                weight,
+            )
+        )
+    return scenario
+
+
+def endpoint_picker(endpoints: List[Dict]) -> Callable[[], int]:
+    """Index of a random endpoint, in proportion to the weights."""
+    if len(endpoints) == 1:
+        return lambda: 0
+    population = range(len(endpoints))
+    cum_weights = list(accumulate(e["weight"] for e in endpoints))
+    return lambda: engine.random.choices(population, cum_weights=cum_weights)[0]
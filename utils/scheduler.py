@@ -0,0 +1,215 @@
+import asyncio
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+# A request starting later than this after its slot counts as late.
+LATE_THRESHOLD = 0.001
+
+# How often idle workers re-check a stage profile for work.
+POLL_INTERVAL = 0.05
+
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+@dataclass(slots=True)
+class Job:
+    index: int
+    # perf_counter() time the request was meant to be sent, in rate mode.
+    scheduled: Optional[float] = None
+    # Index of the profile stage the job belongs to.
+    stage: Optional[int] = None
+    # Ready-made (method, url, body, headers), for replayed traffic.
+    request: Optional[tuple] = None
+
+
+def parse_duration(value: Union[str, float]) -> float:
+    """Seconds from a number or a string such as ``90``, ``30s``, ``5m`` or ``1h``."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = value.strip()
+    for unit in sorted(DURATION_UNITS, key=len, reverse=True):
+        if value.endswith(unit):
+            return float(value[: -len(unit)]) * DURATION_UNITS[unit]
+    return float(value)
+
+
+def load_profile(data: Union[Dict, List]) -> List[Dict]:
+    """
+    Normalize a stage profile. Each stage has a ``duration`` and either a
+    target ``concurrency`` or a target ``rate``; ``ramp`` is ``step``
+    (jump to the target) or ``linear`` (ramp from the previous target).
+    """
+    stages = data.get("stages", []) if isinstance(data, dict) else data
+    if not stages:
+        raise ValueError("profile has no stages")
+
+    profile = []
+    for i, stage in enumerate(stages, 1):
+        if ("rate" in stage) == ("concurrency" in stage):
+            raise ValueError(f"stage {i} needs exactly one of 'rate' or 'concurrency'")
+        ramp = stage.get("ramp", "step")
+        if ramp not in ("step", "linear"):
+            raise ValueError(f"stage {i} has unknown ramp '{ramp}'")
+        kind = "rate" if "rate" in stage else "concurrency"
+        profile.append(
+            {
+                "name": stage.get("name", f"Stage {i}"),
+                "duration": parse_duration(stage["duration"]),
+                "kind": kind,
+                "target": float(stage[kind]),
+                "ramp": ramp,
+            }
+        )
+    return profile
+
+
+class CountedJobs:
+    """Hands out ``total`` jobs lazily, one at a time, to whichever worker asks."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.issued = 0
+
+    async def next(self, worker_id: int = 0) -> Optional[Job]:
+        if self.issued >= self.total:
+            return None
+        self.issued += 1
+        return Job(self.issued - 1)
+
+
+class RateJobs(CountedJobs):
+    """
+    Open-loop source: job ``k`` is due at a fixed time on a constant or
+    Poisson arrival schedule, however many requests are still in flight.
+    A worker that picks a job up late still reports it against its slot.
+    """
+
+    def __init__(self, total: int, rate: float, arrival: str = "constant"):
+        super().__init__(total)
+        self.rate = rate
+        self.arrival = arrival
+        self.start = None
+        self.offset = 0.0
+
+    async def next(self, worker_id: int = 0) -> Optional[Job]:
+        if self.issued >= self.total:
+            return None
+
+        now = time.perf_counter()
+        if self.start is None:
+            self.start = now
+        scheduled = self.start + self.offset
+        self.issued += 1
+
+        if self.arrival == "poisson":
+            self.offset += random.expovariate(self.rate)
+        else:
+            self.offset += 1 / self.rate
+
+        if scheduled > now:
+            await asyncio.sleep(scheduled - now)
+        return Job(self.issued - 1, scheduled)
+
+
+class ProfileJobs:
+    """
+    Follows a stage profile (see load_profile) with one fixed worker pool.
+    Concurrency stages let only the first ``target`` workers take jobs;
+    rate stages hand out open-loop slots like RateJobs, with the rate
+    following the stage's ramp.
+    """
+
+    def __init__(self, profile: List[Dict], arrival: str = "constant"):
+        self.profile = profile
+        self.arrival = arrival
+        self.issued = 0
+        self.start = None
+        self.next_at = None
+        self.rate_stage = None
+
+        self.bounds = []
+        begin = 0.0
+        previous = {"rate": 0.0, "concurrency": 0.0}
+        for stage in profile:
+            end = begin + stage["duration"]
+            self.bounds.append((begin, end, previous[stage["kind"]]))
+            previous[stage["kind"]] = stage["target"]
+            begin = end
+        self.duration = begin
+
+    @property
+    def workers(self) -> int:
+        """Largest concurrency any concurrency stage asks for."""
+        return max(
+            (
+                int(math.ceil(s["target"]))
+                for s in self.profile
+                if s["kind"] == "concurrency"
+            ),
+            default=0,
+        )
+
+    def locate(self, elapsed: float) -> Optional[int]:
+        for index, (begin, end, _) in enumerate(self.bounds):
+            if begin <= elapsed < end:
+                return index
+        return None
+
+    def target(self, index: int, elapsed: float) -> float:
+        stage = self.profile[index]
+        if stage["ramp"] == "step":
+            return stage["target"]
+        begin, end, previous = self.bounds[index]
+        return previous + (stage["target"] - previous) * (elapsed - begin) / (
+            end - begin
+        )
+
+    def _rate_at(self, elapsed: float) -> float:
+        index = self.locate(elapsed)
+        if index is None or self.profile[index]["kind"] != "rate":
+            return 0.0
+        return self.target(index, elapsed)
+
+    def _advance(self, elapsed: float) -> float:
+        """Next arrival after ``elapsed`` under the (time-varying) rate."""
+        need = random.expovariate(1.0) if self.arrival == "poisson" else 1.0
+        step = POLL_INTERVAL / 5
+        while elapsed < self.duration:
+            rate = self._rate_at(elapsed)
+            if rate * step >= need:
+                return elapsed + need / rate
+            need -= rate * step
+            elapsed += step
+        return elapsed
+
+    async def next(self, worker_id: int = 0) -> Optional[Job]:
+        while True:
+            now = time.perf_counter()
+            if self.start is None:
+                self.start = now
+            elapsed = now - self.start
+            index = self.locate(elapsed)
+            if index is None:
+                return None
+            begin, end, _ = self.bounds[index]
+
+            if self.profile[index]["kind"] == "rate":
+                if self.rate_stage != index:
+                    self.rate_stage = index
+                    if self.next_at is None or self.next_at < begin:
+                        self.next_at = max(elapsed, begin)
+                scheduled = self.next_at
+                if scheduled < end:
+                    self.next_at = self._advance(scheduled)
+                    self.issued += 1
+                    if scheduled > elapsed:
+                        await asyncio.sleep(scheduled - elapsed)
+                    return Job(self.issued - 1, self.start + scheduled, index)
+            elif worker_id < self.target(index, elapsed):
+                self.issued += 1
+                return Job(self.issued - 1, None, index)
+
+            await asyncio.sleep(min(POLL_INTERVAL, end - elapsed))
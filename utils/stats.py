@@ -0,0 +1,167 @@
+from typing import Dict
+from utils.histogram import LatencyHistogram
+from utils.scheduler import LATE_THRESHOLD
+
+# Per-stage and per-endpoint breakdowns, each a list of nested stats.
+BREAKDOWNS = ("stages", "endpoints")
+# Where a request's time goes, each with its own histogram: rendering the
+# payload on the request path, waiting for a pooled connection, TCP connect,
+# TLS handshake, writing the request, waiting for the response headers and
+# reading the body.
+PHASES = (
+    "generate",
+    "pool_wait",
+    "connect",
+    "tls",
+    "write",
+    "first_byte",
+    "body",
+)
+
+
+def new_stats() -> Dict:
+    return {
+        "success_count": 0,
+        "failure_count": 0,
+        "status_codes": {},
+        "latency": LatencyHistogram(),
+        "ttfb": LatencyHistogram(),
+        "bytes_received": 0,
+        # Keyed by utils.transport.CONNECTION_STATES.
+        "connections": {"new": 0, "new_tls": 0, "reused": 0},
+        "errors": set(),
+        "error_types": {},
+        "completed": 0,
+        "in_flight": 0,
+        "scheduled": 0,
+        "lag_total": 0.0,
+        "lag_max": 0.0,
+        "late_starts": 0,
+        "cpu_time": 0.0,
+    }
+
+
+def count_result(stats: Dict, result: Dict) -> None:
+    stats["completed"] += 1
+    lag = result.get("schedule_lag")
+    if lag is not None:
+        stats["scheduled"] += 1
+        stats["lag_total"] += lag
+        stats["lag_max"] = max(stats["lag_max"], lag)
+        if lag > LATE_THRESHOLD:
+            stats["late_starts"] += 1
+
+    if result["success"]:
+        stats["success_count"] += 1
+        stats["latency"].record(result["response_time"])
+        stats["ttfb"].record(result["ttfb"])
+        stats["bytes_received"] += result["bytes"]
+        if result["connection"]:
+            stats["connections"][result["connection"]] += 1
+        code = result["status_code"]
+        stats["status_codes"][code] = stats["status_codes"].get(code, 0) + 1
+    else:
+        stats["failure_count"] += 1
+        stats["errors"].add(result["error"])
+        kind = result["error_type"]
+        stats["error_types"][kind] = stats["error_types"].get(kind, 0) + 1
+
+
+def count_phases(stats: Dict, phases: Dict[str, float]) -> None:
+    """Record a request's phase timings; top-level stats only, not breakdowns."""
+    histograms = stats.setdefault(
+        "phases", {name: LatencyHistogram() for name in PHASES}
+    )
+    for name, seconds in phases.items():
+        histograms[name].record(seconds)
+
+
+def snapshot_stats(stats: Dict) -> Dict:
+    """Picklable/JSON-friendly copy of ``stats``, see merge_stats."""
+    snapshot = dict(stats)
+    snapshot["latency"] = stats["latency"].to_dict()
+    snapshot["ttfb"] = stats["ttfb"].to_dict()
+    snapshot["errors"] = list(stats["errors"])
+    snapshot["status_codes"] = dict(stats["status_codes"])
+    snapshot["error_types"] = dict(stats["error_types"])
+    snapshot["connections"] = dict(stats["connections"])
+    if "phases" in stats:
+        snapshot["phases"] = {
+            name: histogram.to_dict() for name, histogram in stats["phases"].items()
+        }
+    for key in BREAKDOWNS:
+        if key in stats:
+            snapshot[key] = [snapshot_stats(part) for part in stats[key]]
+    return snapshot
+
+
+def merge_snapshots(snapshots: Dict) -> Dict:
+    """Fresh stats combining every snapshot in ``snapshots``."""
+    stats = new_stats()
+    for index in sorted(snapshots):
+        merge_stats(stats, snapshots[index])
+    return stats
+
+
+def merge_faker_cache(merged: Dict, counters: Dict) -> Dict:
+    """Add one process's Faker cache counters (see faker_cache_stats) in."""
+    for name, info in counters.items():
+        total = merged.setdefault(
+            name, {"hits": 0, "misses": 0, "maxsize": info["maxsize"], "currsize": 0}
+        )
+        total["hits"] += info["hits"]
+        total["misses"] += info["misses"]
+        total["currsize"] = max(total["currsize"], info["currsize"])
+    return merged
+
+
+def merge_stats(stats: Dict, snapshot: Dict) -> Dict:
+    """Add a snapshot (from another process) into ``stats``."""
+    for key in (
+        "success_count",
+        "failure_count",
+        "completed",
+        "in_flight",
+        "scheduled",
+        "lag_total",
+        "late_starts",
+        "cpu_time",
+        "bytes_received",
+    ):
+        stats[key] += snapshot[key]
+    stats["lag_max"] = max(stats["lag_max"], snapshot["lag_max"])
+    stats["latency"].merge(LatencyHistogram.from_dict(snapshot["latency"]))
+    stats["ttfb"].merge(LatencyHistogram.from_dict(snapshot["ttfb"]))
+    stats["errors"].update(snapshot["errors"])
+    for code, count in snapshot["status_codes"].items():
+        stats["status_codes"][code] = stats["status_codes"].get(code, 0) + count
+    for kind, count in snapshot["error_types"].items():
+        stats["error_types"][kind] = stats["error_types"].get(kind, 0) + count
+    for state, count in snapshot["connections"].items():
+        stats["connections"][state] += count
+    for name, histogram in snapshot.get("phases", {}).items():
+        phases = stats.setdefault(
+            "phases", {phase: LatencyHistogram() for phase in PHASES}
+        )
+        phases[name].merge(LatencyHistogram.from_dict(histogram))
+
+    if "print_sink" in snapshot:
+        printed = stats.setdefault(
+            "print_sink", {"sampled": 0, "printed": 0, "dropped": 0, "failed": 0}
+        )
+        for key, count in snapshot["print_sink"].items():
+            printed[key] += count
+
+    if "replay" in snapshot:
+        replay = stats.setdefault("replay", dict(snapshot["replay"], skipped=0))
+        replay["skipped"] += snapshot["replay"]["skipped"]
+
+    if "faker_cache" in snapshot:
+        merge_faker_cache(stats.setdefault("faker_cache", {}), snapshot["faker_cache"])
+
+    for key in BREAKDOWNS:
+        if key in snapshot:
+            parts = stats.setdefault(key, [new_stats() for _ in snapshot[key]])
+            for part, part_snapshot in zip(parts, snapshot[key]):
+                merge_stats(part, part_snapshot)
+    return stats
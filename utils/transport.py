@@ -0,0 +1,662 @@
+import asyncio
+import contextlib
+import json as jsonlib
+import ssl
+import time
+import weakref
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple, Union
+from urllib.parse import urlencode, urlsplit
+import httpx
+
+TRANSPORTS = ("httpx", "raw")
+# auto negotiates HTTP/2 over TLS; 2 also speaks it to plain http:// URLs.
+HTTP_VERSIONS = ("auto", "1.1", "2")
+USER_AGENT = "BlazeHammer"
+# Slice size for streamed request bodies (``content`` given as a
+# utils.multipart.MultipartBody) on the raw transport.
+STREAM_CHUNK = 1 << 18
+
+# How a request got its connection: a new one (with a TLS handshake for
+# https) or one kept alive from an earlier request.
+CONNECTION_STATES = ("new", "new_tls", "reused")
+
+# What request() returns: the response, the perf_counter() time its first
+# byte arrived, the number of body bytes received, the connection state and
+# the seconds spent in each phase (see utils.stats.PHASES). Without
+# ``keep_body`` the body is counted and thrown away, so the response has no
+# content.
+Exchange = Tuple[object, float, int, Optional[str], Dict[str, float]]
+
+# httpcore trace events (minus .started/.complete) timed as phases.
+TRACE_PHASES = {
+    "connection.connect_tcp": "connect",
+    "connection.start_tls": "tls",
+    "http2.send_connection_init": "connect",
+    "http11.send_request_headers": "write",
+    "http11.send_request_body": "write",
+    "http2.send_request_headers": "write",
+    "http2.send_request_body": "write",
+    "http11.receive_response_headers": "first_byte",
+    "http2.receive_response_headers": "first_byte",
+}
+
+
+def all_tls(urls: Iterable[str]) -> bool:
+    """Whether every URL is https, so ``--http auto`` can negotiate HTTP/2."""
+    urls = list(urls)
+    return bool(urls) and all(urlsplit(url).scheme.lower() == "https" for url in urls)
+
+
+def _new_connection(scheme: str) -> str:
+    return "new_tls" if scheme == "https" else "new"
+
+
+class TransportError(Exception):
+    """Connection or protocol failure in the raw transport."""
+
+
+class PhaseTrace:
+    """
+    httpx ``trace`` extension timing one request. Everything before the
+    first event (waiting for a pooled connection or a free HTTP/2 stream)
+    counts as pool wait.
+    """
+
+    __slots__ = ("start", "started", "phases")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.started = 0.0
+        self.phases = {}
+
+    async def __call__(self, name: str, info: Dict) -> None:
+        now = time.perf_counter()
+        if "pool_wait" not in self.phases:
+            self.phases["pool_wait"] = now - self.start
+        event, _, step = name.rpartition(".")
+        phase = TRACE_PHASES.get(event)
+        if phase is None:
+            return
+        if step == "started":
+            self.started = now
+        elif step == "complete":
+            self.phases[phase] = self.phases.get(phase, 0.0) + now - self.started
+
+
+class HttpxTransport:
+    """
+    Sends requests through a shared ``httpx.AsyncClient``. With
+    ``h2_streams`` the requests are spread over one single-connection client
+    per "lane" instead, each allowed that many concurrent HTTP/2 streams,
+    since httpx itself multiplexes everything onto one connection per host.
+    Lanes need HTTP/2 for sure: ``http="2"``, or ``"auto"`` with ``tls``
+    (every target is https), since plain ``auto`` stays on HTTP/1.1.
+    """
+
+    name = "httpx"
+    errors = (httpx.RequestError, asyncio.TimeoutError)
+
+    def __init__(
+        self,
+        concurrency: int,
+        http: str = "auto",
+        max_connections: Optional[int] = None,
+        keepalive: bool = True,
+        h2_streams: Optional[int] = None,
+        tls: bool = False,
+        **_,
+    ):
+        self.http = http
+        self.lane_limits = None
+        if h2_streams and (http == "2" or (http == "auto" and tls)):
+            lanes = -(-concurrency // h2_streams)
+            if max_connections:
+                lanes = min(lanes, max_connections)
+            self.clients = [self._client(1, keepalive) for _ in range(lanes)]
+            self.lane_limits = [asyncio.Semaphore(h2_streams) for _ in range(lanes)]
+            self.lane_loads = [0] * lanes
+        else:
+            max_connections = max_connections or concurrency * 2
+            self.clients = [
+                self._client(
+                    max_connections, keepalive, min(concurrency, max_connections)
+                )
+            ]
+        self.client = self.clients[0]
+        # Network streams seen so far, to tell new connections from reused.
+        self.streams = weakref.WeakSet()
+        self.exit_stack = None
+
+    def _client(
+        self, max_connections: int, keepalive: bool, max_keepalive: int = 1
+    ) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                # Without keep-alive every connection closes after its request.
+                max_keepalive_connections=max_keepalive if keepalive else 0,
+            ),
+            http1=self.http != "2",
+            http2=self.http != "1.1",
+        )
+
+    async def __aenter__(self):
+        self.exit_stack = contextlib.AsyncExitStack()
+        for client in self.clients:
+            await self.exit_stack.enter_async_context(client)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.exit_stack.__aexit__(*exc_info)
+
+    def _connection_state(self, response) -> Optional[str]:
+        stream = response.extensions.get("network_stream")
+        if stream is None:
+            return None
+        if stream in self.streams:
+            return "reused"
+        self.streams.add(stream)
+        return _new_connection(response.url.scheme)
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict] = None,
+        content: Optional[bytes] = None,
+        json=None,
+        data=None,
+        files=None,
+        timeout: float = 30,
+        keep_body: bool = True,
+    ) -> Exchange:
+        # Started before the lane wait, so a queued stream slot is pool wait.
+        trace = PhaseTrace()
+        arguments = (method, url, headers, content, json, data, files, timeout)
+        if self.lane_limits is None:
+            return await self._request(self.client, *arguments, keep_body, trace)
+
+        lane = min(range(len(self.clients)), key=self.lane_loads.__getitem__)
+        self.lane_loads[lane] += 1
+        try:
+            async with self.lane_limits[lane]:
+                return await self._request(
+                    self.clients[lane], *arguments, keep_body, trace
+                )
+        finally:
+            self.lane_loads[lane] -= 1
+
+    async def _request(
+        self,
+        client: httpx.AsyncClient,
+        method: str,
+        url: str,
+        headers: Optional[Dict],
+        content,
+        json,
+        data,
+        files,
+        timeout: float,
+        keep_body: bool,
+        trace: PhaseTrace,
+    ) -> Exchange:
+        async with client.stream(
+            method,
+            url,
+            headers=headers,
+            content=content,
+            json=json,
+            data=data,
+            files=files,
+            timeout=timeout,
+            extensions={"trace": trace},
+        ) as response:
+            first_byte_at = time.perf_counter()
+            if keep_body:
+                await response.aread()
+            else:
+                async for _ in response.aiter_raw():
+                    pass
+        trace.phases["body"] = time.perf_counter() - first_byte_at
+        return (
+            response,
+            first_byte_at,
+            response.num_bytes_downloaded,
+            self._connection_state(response),
+            trace.phases,
+        )
+
+
+class RawResponse:
+    """The few bits of ``httpx.Response`` the reporting code relies on."""
+
+    __slots__ = ("status_code", "reason_phrase", "headers", "content")
+
+    def __init__(self, status_code: int, reason_phrase: str, headers: Dict, content):
+        self.status_code = status_code
+        self.reason_phrase = reason_phrase
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return jsonlib.loads(self.content)
+
+    def __repr__(self) -> str:
+        return f"<Response [{self.status_code} {self.reason_phrase}]>"
+
+
+class HTTP11Protocol(asyncio.Protocol):
+    """
+    One keep-alive HTTP/1.1 connection. Requests may be pipelined: responses
+    come back in order and resolve the queued futures first-in first-out.
+    Bodies nobody asked to keep are counted and dropped as they arrive.
+    Without ``keep_alive`` the connection closes after its first response.
+    """
+
+    def __init__(self, keep_alive: bool = True):
+        self.transport = None
+        self.keep_alive = keep_alive
+        self.sent = 0
+        # Seconds create_connection took, TLS handshake included.
+        self.connect_time = 0.0
+        # Handed out by RawTransport._acquire but not sent on yet; a new
+        # connection starts reserved for the request that opened it.
+        self.reserved = 1
+        self.buffer = bytearray()
+        self.waiters = deque()
+        self.closed = False
+        self.first_byte_at = None
+        # Held while a body streams out, so pipelined requests queue behind it.
+        self.streaming = asyncio.Lock()
+        self.drained = None
+        self._reset()
+
+    def _reset(self):
+        self.status = None
+        self.reason = ""
+        self.headers = None
+        self.length = None
+        self.chunked = False
+        self.chunks = []
+        self.received = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self.closed = True
+        if self.headers is not None and self.length is None and not self.chunked:
+            # Body delimited by the connection closing.
+            self._consume(len(self.buffer))
+            self._finish()
+        error = TransportError(str(exc) if exc else "connection closed by server")
+        self.resume_writing()
+        while self.waiters:
+            waiter, *_ = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_exception(error)
+
+    def send(
+        self, data: bytes, keep_body: bool = True, bodiless: bool = False
+    ) -> asyncio.Future:
+        """``bodiless``: a HEAD request, whose response never has a body."""
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append((waiter, keep_body, bodiless))
+        self.reserved -= 1
+        self.sent += 1
+        self.transport.write(data)
+        return waiter
+
+    async def send_streamed(
+        self,
+        head: bytes,
+        buffers: Iterable,
+        keep_body: bool = True,
+        bodiless: bool = False,
+    ) -> asyncio.Future:
+        """
+        Send a request whose body is a sequence of (possibly huge) buffers,
+        slice by slice and only as fast as the socket drains, so nothing is
+        copied beyond the slice in flight. Returns once it is all written.
+        """
+        async with self.streaming:
+            waiter = self.send(head, keep_body, bodiless)
+            for buffer in buffers:
+                view = memoryview(buffer)
+                for start in range(0, len(view), STREAM_CHUNK):
+                    if self.closed:
+                        break
+                    self.transport.write(view[start : start + STREAM_CHUNK])
+                    if self.drained is not None:
+                        await self.drained
+        return waiter
+
+    def pause_writing(self):
+        if self.drained is None:
+            self.drained = asyncio.get_running_loop().create_future()
+
+    def resume_writing(self):
+        if self.drained is not None:
+            if not self.drained.done():
+                self.drained.set_result(None)
+            self.drained = None
+
+    def close(self):
+        self.closed = True
+        if self.transport:
+            self.transport.close()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self.waiters) + self.reserved
+
+    @property
+    def keep_body(self) -> bool:
+        return self.waiters[0][1] if self.waiters else True
+
+    def data_received(self, data):
+        if self.first_byte_at is None:
+            self.first_byte_at = time.perf_counter()
+        self.buffer += data
+        try:
+            while self.waiters and self._parse():
+                pass
+        except (ValueError, IndexError) as e:
+            self.connection_lost(TransportError(f"malformed response: {e}"))
+            self.close()
+
+    def _consume(self, size: int):
+        """Move ``size`` body bytes out of the buffer, keeping them if wanted."""
+        if self.keep_body:
+            self.chunks.append(bytes(self.buffer[:size]))
+        del self.buffer[:size]
+        self.received += size
+
+    def _parse(self) -> bool:
+        """Consume one response from the buffer if it is complete."""
+        buffer = self.buffer
+        if self.headers is None:
+            end = buffer.find(b"\r\n\r\n")
+            if end < 0:
+                return False
+            lines = bytes(buffer[:end]).decode("latin-1").split("\r\n")
+            del buffer[: end + 4]
+            _, status, *reason = lines[0].split(" ", 2)
+            self.status = int(status)
+            self.reason = reason[0] if reason else ""
+            self.headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                self.headers[name.strip().lower()] = value.strip()
+            if 100 <= self.status < 200 and self.status != 101:
+                # Interim response (100 Continue, 103 Early Hints): the
+                # final one for the same request follows.
+                self._reset()
+                return True
+            if self.status in (101, 204, 304) or self.waiters[0][2]:
+                self.length = 0
+            elif "chunked" in self.headers.get("transfer-encoding", "").lower():
+                self.chunked = True
+            elif "content-length" in self.headers:
+                self.length = int(self.headers["content-length"])
+
+        if self.chunked:
+            return self._parse_chunks()
+        if self.length is None:
+            if not self.keep_body:
+                self._consume(len(buffer))
+            return False
+        self._consume(min(len(buffer), self.length - self.received))
+        if self.received < self.length:
+            return False
+        self._finish()
+        return True
+
+    def _parse_chunks(self) -> bool:
+        buffer = self.buffer
+        while True:
+            end = buffer.find(b"\r\n")
+            if end < 0:
+                return False
+            size = int(bytes(buffer[:end]).split(b";")[0], 16)
+            if size == 0:
+                trailer_end = buffer.find(b"\r\n\r\n", end)
+                if trailer_end >= 0:
+                    del buffer[: trailer_end + 4]
+                else:
+                    return False
+                self._finish()
+                return True
+            if len(buffer) < end + 2 + size + 2:
+                return False
+            del buffer[: end + 2]
+            self._consume(size)
+            del buffer[:2]
+
+    def _finish(self):
+        response = RawResponse(
+            self.status, self.reason, self.headers, b"".join(self.chunks)
+        )
+        exchange = (response, self.first_byte_at, self.received)
+        keep_alive = (
+            self.keep_alive and self.headers.get("connection", "").lower() != "close"
+        )
+        self._reset()
+        # A pipelined response may already be waiting in the buffer.
+        self.first_byte_at = time.perf_counter() if self.buffer else None
+        if self.waiters:
+            waiter, *_ = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(exchange)
+        if not keep_alive:
+            self.close()
+
+
+class RawTransport:
+    """
+    Lean HTTP/1.1 client on ``asyncio.Protocol``: keep-alive connections,
+    optional pipelining (``pipeline`` requests in flight per connection) and
+    none of httpx's per-request model objects. No HTTP/2, redirects or
+    cookies.
+    """
+
+    name = "raw"
+    errors = (TransportError, OSError, asyncio.TimeoutError)
+
+    def __init__(
+        self,
+        concurrency: int,
+        pipeline: int = 1,
+        max_connections: Optional[int] = None,
+        keepalive: bool = True,
+        **_,
+    ):
+        # A connection that closes after one response cannot pipeline.
+        self.pipeline = max(pipeline, 1) if keepalive else 1
+        self.keepalive = keepalive
+        self.max_connections = max_connections or max(
+            -(-concurrency // self.pipeline), 1
+        )
+        self.pools = {}
+        self.available = None
+        self.waiting = 0
+        self.ssl_context = None
+
+    async def __aenter__(self):
+        self.available = asyncio.Condition()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        for pool in self.pools.values():
+            for connection in pool:
+                connection.close()
+        self.pools.clear()
+
+    async def _acquire(self, scheme: str, host: str, port: int) -> HTTP11Protocol:
+        pool = self.pools.setdefault((scheme, host, port), [])
+        async with self.available:
+            while True:
+                pool[:] = [c for c in pool if not c.closed]
+                idle = min(
+                    (c for c in pool if c.transport is not None),
+                    key=lambda c: c.in_flight,
+                    default=None,
+                )
+                if idle is not None and idle.in_flight == 0:
+                    idle.reserved += 1
+                    return idle
+                if len(pool) < self.max_connections:
+                    break
+                if idle is not None and idle.in_flight < self.pipeline:
+                    idle.reserved += 1
+                    return idle
+                self.waiting += 1
+                try:
+                    await self.available.wait()
+                finally:
+                    self.waiting -= 1
+
+            connection = HTTP11Protocol(self.keepalive)
+            pool.append(connection)
+
+        try:
+            ssl_context = None
+            if scheme == "https":
+                if self.ssl_context is None:
+                    self.ssl_context = ssl.create_default_context()
+                ssl_context = self.ssl_context
+            started = time.perf_counter()
+            await asyncio.get_running_loop().create_connection(
+                lambda: connection, host, port, ssl=ssl_context
+            )
+            connection.connect_time = time.perf_counter() - started
+        except BaseException:
+            connection.closed = True
+            await self._release()
+            raise
+        return connection
+
+    async def _release(self):
+        if self.waiting:
+            async with self.available:
+                self.available.notify()
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict] = None,
+        content: Optional[bytes] = None,
+        json=None,
+        data=None,
+        files=None,
+        timeout: float = 30,
+        keep_body: bool = True,
+    ) -> Exchange:
+        if files:
+            raise TransportError("the raw transport does not support file uploads")
+
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        host = parts.hostname
+        port = parts.port or (443 if scheme == "https" else 80)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+
+        request_headers = {
+            "host": parts.netloc,
+            "user-agent": USER_AGENT,
+            "accept": "*/*",
+        }
+        body = b""
+        if content is not None:
+            body = content
+        elif json is not None:
+            body = jsonlib.dumps(json).encode()
+            request_headers["content-type"] = "application/json"
+        elif data is not None:
+            body = urlencode(data, doseq=True).encode()
+            request_headers["content-type"] = "application/x-www-form-urlencoded"
+        if body or method == "POST":
+            request_headers["content-length"] = str(len(body))
+        if not self.keepalive:
+            request_headers["connection"] = "close"
+        for name, value in (headers or {}).items():
+            request_headers[name.lower()] = str(value)
+
+        head = f"{method} {target} HTTP/1.1\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in request_headers.items()
+        )
+        head = head.encode("latin-1") + b"\r\n"
+        bodiless = method == "HEAD"
+        start = time.perf_counter()
+        connection = await asyncio.wait_for(self._acquire(scheme, host, port), timeout)
+        acquired = time.perf_counter()
+        if connection.sent:
+            state, phases = "reused", {"pool_wait": acquired - start}
+        else:
+            # The raw transport cannot tell the TLS handshake from connect.
+            state = _new_connection(scheme)
+            phases = {
+                "pool_wait": acquired - start - connection.connect_time,
+                "connect": connection.connect_time,
+            }
+        try:
+            if not isinstance(body, bytes):
+                reply = await asyncio.wait_for(
+                    connection.send_streamed(head, body.buffers(), keep_body, bodiless),
+                    timeout,
+                )
+            elif connection.streaming.locked():
+                async with connection.streaming:
+                    reply = connection.send(head + body, keep_body, bodiless)
+            else:
+                reply = connection.send(head + body, keep_body, bodiless)
+            written_at = time.perf_counter()
+            response, first_byte_at, received = await asyncio.wait_for(reply, timeout)
+            phases["write"] = written_at - acquired
+            phases["first_byte"] = max(first_byte_at - written_at, 0.0)
+            phases["body"] = time.perf_counter() - first_byte_at
+            return response, first_byte_at, received, state, phases
+        except asyncio.TimeoutError:
+            # Later pipelined responses can no longer be matched up.
+            connection.close()
+            raise
+        finally:
+            await self._release()
+
+
+Transport = Union[HttpxTransport, RawTransport]
+
+
+def create_transport(
+    name: str,
+    concurrency: int,
+    pipeline: int = 1,
+    http: str = "auto",
+    max_connections: Optional[int] = None,
+    keepalive: bool = True,
+    h2_streams: Optional[int] = None,
+    tls: bool = False,
+) -> Transport:
+    if name == "raw":
+        return RawTransport(
+            concurrency,
+            pipeline=pipeline,
+            max_connections=max_connections,
+            keepalive=keepalive,
+        )
+    return HttpxTransport(
+        concurrency,
+        http=http,
+        max_connections=max_connections,
+        keepalive=keepalive,
+        h2_streams=h2_streams,
+        tls=tls,
+    )